@@ -0,0 +1,9 @@
+-- Index the per-user lookups ("list my connections", "list my canvases").
+-- SQLite does not index foreign key columns automatically, so these queries
+-- and the ON DELETE CASCADE from users were full table scans.
+
+CREATE INDEX IF NOT EXISTS idx_bigquery_connections_user_email ON bigquery_connections(user_id, email);
+CREATE INDEX IF NOT EXISTS idx_snowflake_connections_user ON snowflake_connections(user_id);
+CREATE INDEX IF NOT EXISTS idx_clickhouse_connections_user ON clickhouse_connections(user_id);
+CREATE INDEX IF NOT EXISTS idx_canvases_user_updated ON canvases(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_canvas_shares_canvas ON canvas_shares(canvas_id);
@@ -27,6 +27,22 @@ pub struct UserRow {
     pub subscription_cancel_at_period_end: bool,
 }
 
+impl UserRow {
+    /// Whether the user may use Pro features (Pro plan or VIP).
+    pub fn has_pro_access(&self) -> bool {
+        self.is_vip || self.plan == "pro"
+    }
+}
+
+/// The user row plus whether the presented session token is revoked, read
+/// together so authentication costs one database round trip.
+#[derive(sqlx::FromRow)]
+struct SessionRow {
+    #[sqlx(flatten)]
+    user: UserRow,
+    revoked: bool,
+}
+
 /// Extractor that validates the JWT and loads the user from the database.
 /// Equivalent to Python's `get_current_user` dependency.
 pub struct AuthUser(pub UserRow);
@@ -58,38 +74,40 @@ where
         let claims = verify_session_token(token, &config.jwt_secret)
             .map_err(|_| auth_error("Invalid or expired session token"))?;
 
-        // Check revocation list
-        if token_revocation::is_token_revoked(db, token).await {
-            return Err(auth_error("Session has been revoked"));
-        }
-
-        // Load user from DB
-        let user: UserRow = sqlx::query_as(
+        // Load user from DB and check the revocation list in the same query
+        let session: SessionRow = sqlx::query_as(
             "SELECT id, email, first_name, last_name, plan, plan_expires_at, is_vip,
-                    polar_customer_id, polar_subscription_id, subscription_cancel_at_period_end
+                    polar_customer_id, polar_subscription_id, subscription_cancel_at_period_end,
+                    EXISTS(SELECT 1 FROM revoked_tokens WHERE token_hash = ?) AS revoked
              FROM users WHERE id = ?",
         )
+        .bind(token_revocation::hash_token(token))
         .bind(&claims.user_id)
         .fetch_optional(db)
         .await
         .map_err(|_| auth_error("Database error"))?
         .ok_or_else(|| auth_error("User not found"))?;
 
+        if session.revoked {
+            return Err(auth_error("Session has been revoked"));
+        }
+        let mut user = session.user;
+
         // Verify email matches
         if user.email != claims.email {
             return Err(auth_error("Invalid session"));
         }
 
         // VIP override: config is source of truth
-        if config.vip_emails.contains(&user.email.to_lowercase()) && !user.is_vip {
+        if !user.is_vip && config.is_vip_email(&user.email) {
             let _ = sqlx::query("UPDATE users SET is_vip = 1 WHERE id = ?")
                 .bind(&user.id)
                 .execute(db)
                 .await;
+            user.is_vip = true;
         }
 
         // Check expired Pro subscription (safety net)
-        let mut user = user;
         if user.plan == "pro" {
             if let Some(expires_at) = &user.plan_expires_at {
                 if *expires_at < Utc::now().naive_utc() {
@@ -110,7 +128,7 @@ where
 
 /// Check if user has Pro plan or VIP status. Returns an error response if not.
 pub fn check_pro_or_vip(user: &UserRow) -> Result<(), Response> {
-    if user.plan == "pro" || user.is_vip {
+    if user.has_pro_access() {
         Ok(())
     } else {
         Err((
@@ -1,11 +1,22 @@
 use std::collections::HashSet;
 use std::env;
+use std::path::{Path, PathBuf};
 
 /// Application settings, read from environment variables (same names as the Python backend).
 #[derive(Debug, Clone)]
 pub struct Config {
     // Database
     pub database_url: String,
+    // Desktop: open this SQLite file directly instead of parsing `database_url`
+    pub database_path: Option<PathBuf>,
+    pub db_max_connections: u32,
+    pub db_min_connections: u32,
+    pub db_acquire_timeout_secs: u64,
+    pub db_idle_timeout_secs: u64,
+    pub db_max_lifetime_secs: u64,
+    // Apply pending migrations when the pool is created. Disable on replicas
+    // when a single job runs `squill-server --migrate` before rollout.
+    pub auto_migrate: bool,
 
     // Google OAuth
     pub google_client_id: String,
@@ -58,6 +69,15 @@ impl Config {
         Self {
             database_url: env::var("DATABASE_URL")
                 .unwrap_or_else(|_| "sqlite:./squill.db".to_string()),
+            database_path: None,
+            db_max_connections: env_parse("DB_MAX_CONNECTIONS", 10),
+            db_min_connections: env_parse("DB_MIN_CONNECTIONS", 4),
+            db_acquire_timeout_secs: env_parse("DB_ACQUIRE_TIMEOUT_SECS", 30),
+            db_idle_timeout_secs: env_parse("DB_IDLE_TIMEOUT_SECS", 600),
+            db_max_lifetime_secs: env_parse("DB_MAX_LIFETIME_SECS", 3600),
+            auto_migrate: env::var("AUTO_MIGRATE")
+                .map(|v| v == "1" || v == "true")
+                .unwrap_or(true),
 
             google_client_id: env::var("GOOGLE_CLIENT_ID").unwrap_or_default(),
             google_client_secret: env::var("GOOGLE_CLIENT_SECRET").unwrap_or_default(),
@@ -71,10 +91,7 @@ impl Config {
             token_encryption_key: env::var("TOKEN_ENCRYPTION_KEY").unwrap_or_default(),
 
             jwt_secret: env::var("JWT_SECRET").unwrap_or_default(),
-            jwt_expiration_days: env::var("JWT_EXPIRATION_DAYS")
-                .ok()
-                .and_then(|v| v.parse().ok())
-                .unwrap_or(30),
+            jwt_expiration_days: env_parse("JWT_EXPIRATION_DAYS", 30),
 
             openai_api_key: env::var("OPENAI_API_KEY").unwrap_or_default(),
 
@@ -111,9 +128,10 @@ impl Config {
     }
 
     /// Create config with explicit overrides for desktop embedding.
-    pub fn from_env_with_overrides(database_url: &str, test_mode: bool) -> Self {
+    pub fn from_env_with_overrides(database_path: &Path, test_mode: bool) -> Self {
         let mut config = Self::from_env();
-        config.database_url = database_url.to_string();
+        config.database_url = format!("sqlite:{}", database_path.display());
+        config.database_path = Some(database_path.to_path_buf());
         config.test_mode = test_mode;
         config.desktop_mode = true;
         // Desktop mode: add localhost with the embedded port to CORS origins
@@ -122,4 +140,28 @@ impl Config {
         }
         config
     }
+
+    /// Whether `email` is listed in `VIP_EMAILS` (case-insensitive).
+    ///
+    /// Emails are usually stored lowercase already, so only fold case (and
+    /// allocate) when the address actually contains uppercase letters.
+    pub fn is_vip_email(&self, email: &str) -> bool {
+        if self.vip_emails.is_empty() {
+            return false;
+        }
+        if email.bytes().any(|b| b.is_ascii_uppercase()) || !email.is_ascii() {
+            self.vip_emails.contains(&email.to_lowercase())
+        } else {
+            self.vip_emails.contains(email)
+        }
+    }
+}
+
+/// Read an environment variable and parse it, falling back to `default` when
+/// the variable is unset or malformed.
+fn env_parse<T: std::str::FromStr>(key: &str, default: T) -> T {
+    env::var(key)
+        .ok()
+        .and_then(|v| v.parse().ok())
+        .unwrap_or(default)
 }
@@ -1,26 +1,54 @@
 use sqlx::sqlite::{SqliteConnectOptions, SqlitePoolOptions};
 use sqlx::SqlitePool;
 use std::str::FromStr;
+use std::time::Duration;
 
-/// Create and return a SQLite connection pool, running migrations on startup.
-pub async fn create_pool(database_url: &str) -> Result<SqlitePool, sqlx::Error> {
-    let options = SqliteConnectOptions::from_str(database_url)?
+use crate::config::Config;
+
+/// Create and return a SQLite connection pool.
+///
+/// Pool sizing and connection lifetimes come from the `DB_*` settings in [`Config`].
+/// Migrations are applied here unless `AUTO_MIGRATE` is disabled, in which case
+/// they are expected to have been run out-of-band via [`run_migrations`].
+pub async fn create_pool(config: &Config) -> Result<SqlitePool, sqlx::Error> {
+    // A filesystem path is used as-is; URL parsing would misread paths
+    // containing `?`, `#` or `%`.
+    let options = match &config.database_path {
+        Some(path) => SqliteConnectOptions::new().filename(path),
+        None => SqliteConnectOptions::from_str(&config.database_url)?,
+    };
+    let options = options
         .create_if_missing(true)
         .journal_mode(sqlx::sqlite::SqliteJournalMode::Wal)
         .foreign_keys(true)
         .busy_timeout(std::time::Duration::from_secs(5));
 
+    // SQLite connections are local files with no network to drop, so skip the
+    // liveness ping sqlx otherwise issues on every checkout.
     let pool = SqlitePoolOptions::new()
-        .max_connections(5)
+        .test_before_acquire(false)
+        .max_connections(config.db_max_connections)
+        // Keep a few connections open (and their PRAGMAs applied) so the first
+        // burst of requests after startup or an idle period doesn't open them.
+        .min_connections(config.db_min_connections.min(config.db_max_connections))
+        .acquire_timeout(Duration::from_secs(config.db_acquire_timeout_secs))
+        .idle_timeout(Duration::from_secs(config.db_idle_timeout_secs))
+        .max_lifetime(Duration::from_secs(config.db_max_lifetime_secs))
         .connect_with(options)
         .await?;
 
-    // Run embedded migrations
-    sqlx::migrate!("./migrations").run(&pool).await?;
+    if config.auto_migrate {
+        run_migrations(&pool).await?;
+    }
 
     Ok(pool)
 }
 
+/// Apply any pending embedded migrations. Already-applied versions are skipped.
+pub async fn run_migrations(pool: &SqlitePool) -> Result<(), sqlx::migrate::MigrateError> {
+    sqlx::migrate!("./migrations").run(pool).await
+}
+
 /// Idempotently create a local VIP user for desktop/MCP usage.
 ///
 /// This ensures the MCP tools can operate without OAuth by guaranteeing the
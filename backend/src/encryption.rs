@@ -52,6 +52,10 @@ impl TokenEncryption {
 
     /// Decrypt ciphertext with the given IV.
     pub fn decrypt(&self, ciphertext: &[u8], iv: &[u8]) -> Result<String, String> {
+        // Nonce::from_slice panics on a wrong length; a bad stored IV is an error.
+        if iv.len() != 12 {
+            return Err(format!("IV must be 12 bytes, got {}", iv.len()));
+        }
         let nonce = Nonce::from_slice(iv);
         let plaintext = self
             .cipher
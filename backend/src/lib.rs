@@ -7,6 +7,7 @@ pub mod helpers;
 pub mod rate_limit;
 pub mod routes;
 pub mod services;
+pub mod singleflight;
 pub mod token_revocation;
 
 use axum::response::IntoResponse;
@@ -15,10 +16,14 @@ use config::Config;
 use encryption::TokenEncryption;
 use http::header;
 use rate_limit::RateLimiter;
+use services::oauth::{GitHubOAuthService, GoogleOAuthService, MicrosoftOAuthService};
+use services::polar::PolarApi;
 use services::ws_manager::WsManager;
 use sqlx::SqlitePool;
+use std::collections::HashSet;
 use std::sync::Arc;
-use tower_http::cors::CorsLayer;
+use std::time::Duration;
+use tower_http::cors::{AllowOrigin, CorsLayer};
 use tower_http::trace::TraceLayer;
 
 /// Shared application state available to all route handlers.
@@ -29,25 +34,95 @@ pub struct AppState {
     pub ws_manager: Arc<WsManager>,
     pub encryption: Option<Arc<TokenEncryption>>,
     pub http_client: reqwest::Client,
+    pub google_oauth: Arc<GoogleOAuthService>,
+    pub github_oauth: Arc<GitHubOAuthService>,
+    pub microsoft_oauth: Arc<MicrosoftOAuthService>,
+    pub polar: Arc<PolarApi>,
     pub rate_limiter: Arc<RateLimiter>,
     pub general_rate_limiter: Arc<RateLimiter>,
 }
 
+impl AppState {
+    /// Build the shared state used by both the standalone server and the desktop app.
+    pub fn new(db: SqlitePool, config: Config, encryption: Option<Arc<TokenEncryption>>) -> Self {
+        // One pooled client for every outbound API call (OAuth, Polar, OpenAI).
+        // TCP keepalive stops idle pooled connections from being silently
+        // dropped by NATs, so TLS sessions to the same hosts get reused.
+        let http_client = reqwest::Client::builder()
+            .connect_timeout(Duration::from_secs(10))
+            .tcp_keepalive(Duration::from_secs(60))
+            .build()
+            .expect("Failed to build HTTP client");
+        // OAuth providers share the one HTTP client (and its keep-alive pool).
+        let google_oauth = Arc::new(GoogleOAuthService::new(
+            &config.google_client_id,
+            &config.google_client_secret,
+            config.test_mode,
+            http_client.clone(),
+        ));
+        let github_oauth = Arc::new(GitHubOAuthService::new(
+            &config.github_client_id,
+            &config.github_client_secret,
+            config.test_mode,
+            http_client.clone(),
+        ));
+        let microsoft_oauth = Arc::new(MicrosoftOAuthService::new(
+            &config.microsoft_client_id,
+            &config.microsoft_client_secret,
+            config.test_mode,
+            http_client.clone(),
+        ));
+        let polar = Arc::new(PolarApi::new(
+            &config.polar_access_token,
+            &config.polar_server,
+            http_client.clone(),
+        ));
+        Self {
+            db,
+            config: Arc::new(config),
+            ws_manager: Arc::new(WsManager::new()),
+            encryption,
+            http_client,
+            google_oauth,
+            github_oauth,
+            microsoft_oauth,
+            polar,
+            // Auth endpoints: 20 requests per 60 seconds per IP
+            rate_limiter: Arc::new(RateLimiter::new(20, 60)),
+            // General endpoints: 200 requests per 60 seconds per IP
+            general_rate_limiter: Arc::new(RateLimiter::new(200, 60)),
+        }
+    }
+
+    /// The credential encryption service, or a 500 response if it is not configured.
+    pub fn require_encryption(&self) -> Result<&TokenEncryption, axum::response::Response> {
+        self.encryption.as_deref().ok_or_else(|| {
+            error::error_response(
+                http::StatusCode::INTERNAL_SERVER_ERROR,
+                "Encryption not configured",
+            )
+        })
+    }
+}
+
 /// Build the Axum router with all routes and middleware.
 /// This is the main entry point for both the standalone server and desktop embedding.
 pub fn build_app(state: AppState) -> Router {
     let config = &state.config;
 
-    let origins: Vec<_> = config
-        .cors_origins
-        .iter()
-        .filter_map(|o| o.parse().ok())
-        .collect();
+    // Hashed lookup: `AllowOrigin::list` scans every configured origin per request.
+    let origins: Arc<HashSet<http::HeaderValue>> = Arc::new(
+        config
+            .cors_origins
+            .iter()
+            .filter_map(|o| o.parse().ok())
+            .collect(),
+    );
 
     // tower-http doesn't allow wildcard headers with credentials,
     // so we list the headers the frontend actually sends.
     let cors = CorsLayer::new()
-        .allow_origin(origins)
+        .allow_origin(AllowOrigin::predicate(move |origin, _| origins.contains(origin)))
         .allow_methods([
             http::Method::GET,
             http::Method::POST,
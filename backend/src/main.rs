@@ -1,7 +1,7 @@
 use clap::Parser;
 use squill_server::{
-    build_app, config::Config, db, encryption::TokenEncryption, rate_limit::RateLimiter,
-    routes::mcp_oauth, services::ws_manager::WsManager, token_revocation, AppState,
+    build_app, config::Config, db, encryption::TokenEncryption, routes::mcp_oauth,
+    token_revocation, AppState,
 };
 use std::sync::Arc;
 use tokio::net::TcpListener;
@@ -16,6 +16,10 @@ struct Cli {
     /// Port to listen on
     #[arg(long, default_value = "8000")]
     port: u16,
+
+    /// Apply pending database migrations and exit without serving
+    #[arg(long)]
+    migrate: bool,
 }
 
 #[tokio::main]
@@ -29,15 +33,27 @@ async fn main() -> anyhow::Result<()> {
         .init();
 
     let cli = Cli::parse();
-    let config = Config::from_env();
+    let mut config = Config::from_env();
+
+    if cli.migrate {
+        config.auto_migrate = false;
+        let pool = db::create_pool(&config).await?;
+        db::run_migrations(&pool).await?;
+        tracing::info!("Migrations applied");
+        return Ok(());
+    }
 
     if config.jwt_secret.is_empty() {
         anyhow::bail!("JWT_SECRET environment variable must be set");
     }
 
     tracing::info!("Connecting to database: {}", config.database_url);
-    let pool = db::create_pool(&config.database_url).await?;
-    tracing::info!("Database ready, migrations applied");
+    let pool = db::create_pool(&config).await?;
+    if config.auto_migrate {
+        tracing::info!("Database ready, migrations applied");
+    } else {
+        tracing::info!("Database ready (AUTO_MIGRATE disabled, skipping migrations)");
+    }
 
     db::ensure_mcp_local_user(&pool, &config.mcp_user_id).await?;
     tracing::info!("MCP local user ensured: {}", config.mcp_user_id);
@@ -61,20 +77,7 @@ async fn main() -> anyhow::Result<()> {
         ))
     };
 
-    // Auth endpoints: 20 requests per 60 seconds per IP
-    let rate_limiter = Arc::new(RateLimiter::new(20, 60));
-    // General endpoints: 200 requests per 60 seconds per IP
-    let general_rate_limiter = Arc::new(RateLimiter::new(200, 60));
-
-    let state = AppState {
-        db: pool,
-        config: Arc::new(config),
-        ws_manager: Arc::new(WsManager::new()),
-        encryption,
-        http_client: reqwest::Client::new(),
-        rate_limiter,
-        general_rate_limiter,
-    };
+    let state = AppState::new(pool, config, encryption);
 
     // Background task: clean up expired share tokens and revoked JWT entries every hour
     let cleanup_pool = state.db.clone();
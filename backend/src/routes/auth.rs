@@ -13,8 +13,12 @@ use axum::extract::{Path, State};
 use axum::http::StatusCode;
 use axum::response::{IntoResponse, Response};
 use axum::Json;
+use std::num::NonZeroUsize;
+use std::sync::{Mutex, OnceLock};
+use std::time::{Duration, Instant};
 
 use crate::rate_limit::RateLimited;
+use lru::LruCache;
 use serde::{Deserialize, Serialize};
 use serde_json::{json, Value};
 use uuid::Uuid;
@@ -23,7 +27,7 @@ use crate::auth::jwt::{create_session_token, verify_session_token};
 use crate::auth::middleware::AuthUser;
 use crate::error::error_response;
 use crate::helpers::now_sqlite;
-use crate::services::oauth::{GitHubOAuthService, GoogleOAuthService, MicrosoftOAuthService};
+use crate::singleflight::KeyedLocks;
 use crate::token_revocation;
 use crate::AppState;
 
@@ -64,6 +68,10 @@ struct CallbackResponse {
 #[derive(Deserialize)]
 pub struct RefreshRequest {
     email: String,
+    /// Access token the caller just had rejected (e.g. a 401 from Google). A
+    /// cached copy of it is dropped so the refresh goes back to Google.
+    #[serde(default)]
+    rejected_token: Option<String>,
 }
 
 #[derive(Serialize)]
@@ -108,6 +116,84 @@ struct BqConnectionRow {
     encryption_iv: Vec<u8>,
 }
 
+// ---------------------------------------------------------------------------
+// Google access-token cache
+// ---------------------------------------------------------------------------
+
+// Google access tokens stay valid for about an hour. Reusing one skips the
+// connection lookup, the refresh-token decrypt and the Google round-trip that
+// every `/auth/refresh` call would otherwise make.
+
+const ACCESS_TOKEN_CACHE_SIZE: usize = 10_000;
+/// Stop handing out a cached token this long before Google expires it.
+const ACCESS_TOKEN_EXPIRY_MARGIN: Duration = Duration::from_secs(60);
+
+/// Keyed by `(user_id, email)`, the same pair that identifies a BigQuery connection.
+type AccessTokenKey = (String, String);
+
+struct CachedAccessToken {
+    access_token: String,
+    expires_at: Instant,
+}
+
+fn access_token_cache() -> &'static Mutex<LruCache<AccessTokenKey, CachedAccessToken>> {
+    static CACHE: OnceLock<Mutex<LruCache<AccessTokenKey, CachedAccessToken>>> = OnceLock::new();
+    CACHE.get_or_init(|| {
+        Mutex::new(LruCache::new(
+            NonZeroUsize::new(ACCESS_TOKEN_CACHE_SIZE).unwrap(),
+        ))
+    })
+}
+
+/// Return a cached access token with its remaining lifetime, if it is still
+/// comfortably within its validity window.
+fn cached_access_token(key: &AccessTokenKey) -> Option<RefreshResponse> {
+    let mut cache = access_token_cache().lock().unwrap();
+    let entry = cache.get(key)?;
+    // The margin only decides whether the token is fresh enough to serve;
+    // callers get its true remaining lifetime and apply their own margin.
+    let remaining = entry.expires_at.checked_duration_since(Instant::now())?;
+    if remaining < ACCESS_TOKEN_EXPIRY_MARGIN {
+        return None;
+    }
+    Some(RefreshResponse {
+        access_token: entry.access_token.clone(),
+        expires_in: remaining.as_secs() as i64,
+    })
+}
+
+fn cache_access_token(key: AccessTokenKey, access_token: &str, expires_in: i64) {
+    if access_token.is_empty() || expires_in <= 0 {
+        return;
+    }
+    access_token_cache().lock().unwrap().put(
+        key,
+        CachedAccessToken {
+            access_token: access_token.to_string(),
+            expires_at: Instant::now() + Duration::from_secs(expires_in as u64),
+        },
+    );
+}
+
+/// Serializes refreshes per connection so concurrent misses share one Google call.
+fn access_token_refresh_locks() -> &'static KeyedLocks<AccessTokenKey> {
+    static LOCKS: OnceLock<KeyedLocks<AccessTokenKey>> = OnceLock::new();
+    LOCKS.get_or_init(KeyedLocks::new)
+}
+
+fn forget_access_token(key: &AccessTokenKey) {
+    access_token_cache().lock().unwrap().pop(key);
+}
+
+/// Drop the cached token for `key` only if it is `token`, so a token another
+/// request already refreshed is kept.
+fn forget_access_token_if(key: &AccessTokenKey, token: &str) {
+    let mut cache = access_token_cache().lock().unwrap();
+    if cache.peek(key).is_some_and(|entry| entry.access_token == token) {
+        cache.pop(key);
+    }
+}
+
 // ---------------------------------------------------------------------------
 // Helpers
 // ---------------------------------------------------------------------------
@@ -127,73 +213,33 @@ fn user_payload(row: &UserRow) -> UserPayload {
     }
 }
 
-/// Look up user by email; create if not found, update name + VIP if found.
+/// Create the user if the email is new, otherwise update name + VIP and stamp
+/// the login, all in one `INSERT ... ON CONFLICT ... RETURNING` statement.
 async fn upsert_user(
     state: &AppState,
     email: &str,
     first_name: Option<&str>,
     last_name: Option<&str>,
 ) -> Result<UserRow, Response> {
-    let is_vip = state.config.vip_emails.contains(&email.to_lowercase());
-
-    let existing: Option<UserRow> = sqlx::query_as(
-        "SELECT id, email, first_name, last_name, plan, is_vip FROM users WHERE email = ?",
+    let is_vip = state.config.is_vip_email(email);
+
+    sqlx::query_as::<_, UserRow>(
+        "INSERT INTO users (id, email, first_name, last_name, plan, is_vip) VALUES (?, ?, ?, ?, 'free', ?)
+         ON CONFLICT(email) DO UPDATE SET
+             first_name = excluded.first_name,
+             last_name = excluded.last_name,
+             is_vip = users.is_vip OR excluded.is_vip,
+             last_login_at = datetime('now')
+         RETURNING id, email, first_name, last_name, plan, is_vip",
     )
+    .bind(Uuid::now_v7().to_string())
     .bind(email)
-    .fetch_optional(&state.db)
+    .bind(first_name)
+    .bind(last_name)
+    .bind(is_vip)
+    .fetch_one(&state.db)
     .await
-    .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
-
-    match existing {
-        Some(mut user) => {
-            let now = now_sqlite();
-            sqlx::query(
-                "UPDATE users SET first_name = ?, last_name = ?, is_vip = ?, last_login_at = ? WHERE id = ?",
-            )
-            .bind(first_name)
-            .bind(last_name)
-            .bind(is_vip || user.is_vip)
-            .bind(&now)
-            .bind(&user.id)
-            .execute(&state.db)
-            .await
-            .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
-
-            user.first_name = first_name.map(|s| s.to_string());
-            user.last_name = last_name.map(|s| s.to_string());
-            if is_vip {
-                user.is_vip = true;
-            }
-            Ok(user)
-        }
-        None => {
-            let id = Uuid::new_v4().to_string();
-            let now = now_sqlite();
-
-            sqlx::query(
-                "INSERT INTO users (id, email, first_name, last_name, plan, is_vip, created_at, last_login_at) VALUES (?, ?, ?, ?, 'free', ?, ?, ?)",
-            )
-            .bind(&id)
-            .bind(email)
-            .bind(first_name)
-            .bind(last_name)
-            .bind(is_vip)
-            .bind(&now)
-            .bind(&now)
-            .execute(&state.db)
-            .await
-            .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
-
-            Ok(UserRow {
-                id,
-                email: email.to_string(),
-                first_name: first_name.map(|s| s.to_string()),
-                last_name: last_name.map(|s| s.to_string()),
-                plan: "free".to_string(),
-                is_vip,
-            })
-        }
-    }
+    .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))
 }
 
 fn value_as_str<'a>(map: &'a std::collections::HashMap<String, Value>, key: &str) -> Option<&'a str> {
@@ -224,12 +270,7 @@ pub async fn google_login(
         ));
     }
 
-    let google = GoogleOAuthService::new(
-        &config.google_client_id,
-        &config.google_client_secret,
-        config.test_mode,
-        state.http_client.clone(),
-    );
+    let google = &state.google_oauth;
 
     // Exchange code for tokens
     let tokens = google
@@ -281,12 +322,7 @@ pub async fn google_callback(
     State(state): State<AppState>,
     Json(body): Json<OAuthCodeRequest>,
 ) -> Result<impl IntoResponse, Response> {
-    let google = GoogleOAuthService::new(
-        &state.config.google_client_id,
-        &state.config.google_client_secret,
-        state.config.test_mode,
-        state.http_client.clone(),
-    );
+    let google = &state.google_oauth;
 
     // Exchange code for tokens
     let tokens = google
@@ -333,38 +369,33 @@ pub async fn google_callback(
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
     if let Some(rt) = &refresh_token {
-        let enc = state.encryption.as_ref()
-            .ok_or_else(|| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Encryption not configured"))?;
+        let enc = state.require_encryption()?;
         let (ciphertext, iv) = enc
             .encrypt(rt)
             .map_err(|e| error_response(StatusCode::INTERNAL_SERVER_ERROR, &format!("Encryption error: {e}")))?;
 
-        let now = now_sqlite();
-
+        // created_at/updated_at come from the column defaults on insert.
         if existing_bq.is_some() {
             sqlx::query(
-                "UPDATE bigquery_connections SET refresh_token_encrypted = ?, encryption_iv = ?, updated_at = ? WHERE user_id = ? AND email = ?",
+                "UPDATE bigquery_connections SET refresh_token_encrypted = ?, encryption_iv = ?, updated_at = datetime('now') WHERE user_id = ? AND email = ?",
             )
             .bind(&ciphertext)
             .bind(&iv)
-            .bind(&now)
             .bind(&user.id)
             .bind(email)
             .execute(&mut *tx)
             .await
             .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
         } else {
-            let bq_id = Uuid::new_v4().to_string();
+            let bq_id = Uuid::now_v7().to_string();
             sqlx::query(
-                "INSERT INTO bigquery_connections (id, user_id, email, refresh_token_encrypted, encryption_iv, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                "INSERT INTO bigquery_connections (id, user_id, email, refresh_token_encrypted, encryption_iv) VALUES (?, ?, ?, ?, ?)",
             )
             .bind(&bq_id)
             .bind(&user.id)
             .bind(email)
             .bind(&ciphertext)
             .bind(&iv)
-            .bind(&now)
-            .bind(&now)
             .execute(&mut *tx)
             .await
             .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
@@ -379,6 +410,10 @@ pub async fn google_callback(
     tx.commit().await
         .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
+    // The code exchange already minted a fresh access token; seed the cache so
+    // the frontend's first `/auth/refresh` doesn't go back to Google.
+    cache_access_token((user.id.clone(), email.to_string()), &access_token, expires_in);
+
     let session_token = create_session_token(
         &user.id,
         &user.email,
@@ -415,12 +450,7 @@ pub async fn github_login(
         ));
     }
 
-    let github = GitHubOAuthService::new(
-        &config.github_client_id,
-        &config.github_client_secret,
-        config.test_mode,
-        state.http_client.clone(),
-    );
+    let github = &state.github_oauth;
 
     let tokens = github
         .exchange_code(&body.code, &body.redirect_uri)
@@ -490,12 +520,7 @@ pub async fn microsoft_login(
         ));
     }
 
-    let microsoft = MicrosoftOAuthService::new(
-        &config.microsoft_client_id,
-        &config.microsoft_client_secret,
-        config.test_mode,
-        state.http_client.clone(),
-    );
+    let microsoft = &state.microsoft_oauth;
 
     let tokens = microsoft
         .exchange_code(&body.code, &body.redirect_uri)
@@ -557,12 +582,21 @@ pub async fn refresh_token(
         return Err(error_response(StatusCode::FORBIDDEN, "Email does not match authenticated user"));
     }
 
-    let google = GoogleOAuthService::new(
-        &state.config.google_client_id,
-        &state.config.google_client_secret,
-        state.config.test_mode,
-        state.http_client.clone(),
-    );
+    let cache_key = (user.id.clone(), body.email.clone());
+    if let Some(rejected) = body.rejected_token.as_deref() {
+        forget_access_token_if(&cache_key, rejected);
+    }
+    if let Some(cached) = cached_access_token(&cache_key) {
+        return Ok(Json(cached));
+    }
+
+    // Whoever gets the lock first refreshes; the others find its token cached.
+    let _refresh = access_token_refresh_locks().lock(cache_key.clone()).await;
+    if let Some(cached) = cached_access_token(&cache_key) {
+        return Ok(Json(cached));
+    }
+
+    let google = &state.google_oauth;
 
     // Find BQ connection by user_id + email
     let bq: BqConnectionRow = sqlx::query_as(
@@ -621,6 +655,7 @@ pub async fn refresh_token(
         .unwrap_or("")
         .to_string();
     let expires_in = value_as_i64(&tokens, "expires_in").unwrap_or(3600);
+    cache_access_token(cache_key, &access_token, expires_in);
 
     Ok(Json(RefreshResponse {
         access_token,
@@ -695,16 +730,13 @@ pub async fn logout(
     .await
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
+    forget_access_token(&(user.id.clone(), body.email.clone()));
+
     if let Some(bq) = bq {
         // Try to revoke with Google (best effort)
         if let Some(enc) = state.encryption.as_ref() {
             if let Ok(rt) = enc.decrypt(&bq.refresh_token_encrypted, &bq.encryption_iv) {
-                let google = GoogleOAuthService::new(
-                    &state.config.google_client_id,
-                    &state.config.google_client_secret,
-                    state.config.test_mode,
-                    state.http_client.clone(),
-                );
+                let google = &state.google_oauth;
                 let _ = google.revoke_token(&rt).await;
             }
         }
@@ -10,6 +10,7 @@ use hmac::{Mac, Hmac};
 use serde::Deserialize;
 use serde_json::{json, Value};
 use sha2::Sha256;
+use sqlx::SqlitePool;
 
 use crate::auth::middleware::AuthUser;
 use crate::error::error_response;
@@ -60,24 +61,25 @@ fn verify_webhook_signature(
         ));
     }
 
-    // Build the signed content: "{msg_id}.{timestamp}.{body}"
-    let body_str = std::str::from_utf8(body)
-        .map_err(|_| error_response(StatusCode::BAD_REQUEST, "Invalid body encoding"))?;
-    let to_sign = format!("{msg_id}.{timestamp_str}.{body_str}");
-
     // The net HMAC key is just secret.as_bytes() — Polar's SDK does
     // base64_encode(secret) then Webhook does base64_decode, which cancels out.
-    let mac = Hmac::<Sha256>::new_from_slice(secret.as_bytes())
+    let mut mac = Hmac::<Sha256>::new_from_slice(secret.as_bytes())
         .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "HMAC key error"))?;
 
+    // Feed the signed content "{msg_id}.{timestamp}.{body}" piecewise rather
+    // than copying the body into a formatted string, and hash it only once.
+    mac.update(msg_id.as_bytes());
+    mac.update(b".");
+    mac.update(timestamp_str.as_bytes());
+    mac.update(b".");
+    mac.update(body);
+
     // The header may contain multiple space-separated signatures.
     // Use Mac::verify_slice for constant-time comparison.
     let valid = signatures.split(' ').any(|sig| {
         if let Some(b64) = sig.strip_prefix("v1,") {
             if let Ok(sig_bytes) = base64::engine::general_purpose::STANDARD.decode(b64) {
-                let mut mac = mac.clone();
-                mac.update(to_sign.as_bytes());
-                return mac.verify_slice(&sig_bytes).is_ok();
+                return mac.clone().verify_slice(&sig_bytes).is_ok();
             }
         }
         false
@@ -90,15 +92,6 @@ fn verify_webhook_signature(
     Ok(())
 }
 
-/// Resolve the Polar API base URL from the config `polar_server` field.
-fn polar_api_base(polar_server: &str) -> &str {
-    if polar_server == "sandbox" {
-        "https://sandbox-api.polar.sh"
-    } else {
-        "https://api.polar.sh"
-    }
-}
-
 // ---------------------------------------------------------------------------
 // Request / response models
 // ---------------------------------------------------------------------------
@@ -136,11 +129,9 @@ pub async fn checkout_session(
     }
 
     // Call Polar API to create a checkout session
-    let base = polar_api_base(&config.polar_server);
-    let client = &state.http_client;
-    let resp = client
-        .post(format!("{base}/v1/checkouts"))
-        .header("Authorization", format!("Bearer {}", config.polar_access_token))
+    let resp = state
+        .polar
+        .post("/v1/checkouts")
         .json(&json!({
             "product_price_id": config.polar_product_id,
             "success_url": format!("{}/checkout/success", config.frontend_url),
@@ -194,34 +185,11 @@ pub async fn cancel_subscription(
         error_response(StatusCode::BAD_REQUEST, "No subscription ID on record")
     })?;
 
-    let config = &state.config;
-
-    if config.test_mode {
+    if state.config.test_mode {
         return Ok(Json(json!({"status": "ok"})));
     }
 
-    let base = polar_api_base(&config.polar_server);
-    let client = &state.http_client;
-    let resp = client
-        .patch(format!("{base}/v1/subscriptions/{sub_id}"))
-        .header("Authorization", format!("Bearer {}", config.polar_access_token))
-        .json(&json!({"cancel_at_period_end": true}))
-        .send()
-        .await
-        .map_err(|e| {
-            tracing::error!("Polar cancel request failed: {e}");
-            error_response(StatusCode::BAD_GATEWAY, "Failed to cancel subscription")
-        })?;
-
-    if !resp.status().is_success() {
-        let status = resp.status();
-        let body = resp.text().await.unwrap_or_default();
-        tracing::error!("Polar cancel error {status}: {body}");
-        return Err(error_response(
-            StatusCode::BAD_GATEWAY,
-            "Polar API returned an error",
-        ));
-    }
+    set_cancel_at_period_end(&state, sub_id, true).await?;
 
     Ok(Json(json!({"status": "ok"})))
 }
@@ -242,36 +210,50 @@ pub async fn resubscribe(
         error_response(StatusCode::BAD_REQUEST, "No subscription ID on record")
     })?;
 
-    let config = &state.config;
-
-    if config.test_mode {
+    if state.config.test_mode {
         return Ok(Json(json!({"status": "ok"})));
     }
 
-    let base = polar_api_base(&config.polar_server);
-    let client = &state.http_client;
-    let resp = client
-        .patch(format!("{base}/v1/subscriptions/{sub_id}"))
-        .header("Authorization", format!("Bearer {}", config.polar_access_token))
-        .json(&json!({"cancel_at_period_end": false}))
+    set_cancel_at_period_end(&state, sub_id, false).await?;
+
+    Ok(Json(json!({"status": "ok"})))
+}
+
+/// Set or clear `cancel_at_period_end` on a Polar subscription. The user row
+/// is updated later by the resulting webhook.
+async fn set_cancel_at_period_end(
+    state: &AppState,
+    sub_id: &str,
+    cancel: bool,
+) -> Result<(), Response> {
+    let (action, failure) = if cancel {
+        ("cancel", "Failed to cancel subscription")
+    } else {
+        ("resubscribe", "Failed to resubscribe")
+    };
+
+    let resp = state
+        .polar
+        .patch(&format!("/v1/subscriptions/{sub_id}"))
+        .json(&json!({"cancel_at_period_end": cancel}))
         .send()
         .await
         .map_err(|e| {
-            tracing::error!("Polar resubscribe request failed: {e}");
-            error_response(StatusCode::BAD_GATEWAY, "Failed to resubscribe")
+            tracing::error!("Polar {action} request failed: {e}");
+            error_response(StatusCode::BAD_GATEWAY, failure)
         })?;
 
     if !resp.status().is_success() {
         let status = resp.status();
         let body = resp.text().await.unwrap_or_default();
-        tracing::error!("Polar resubscribe error {status}: {body}");
+        tracing::error!("Polar {action} error {status}: {body}");
         return Err(error_response(
             StatusCode::BAD_GATEWAY,
             "Polar API returned an error",
         ));
     }
 
-    Ok(Json(json!({"status": "ok"})))
+    Ok(())
 }
 
 /// POST /billing/webhook — Polar webhook receiver (NO auth).
@@ -295,133 +277,11 @@ pub async fn webhook(
     let db = &state.db;
 
     match payload.event_type.as_str() {
-        "subscription.active" => {
-            // Find user by customer email, or metadata.user_id fallback
-            let email = data
-                .pointer("/customer/email")
-                .and_then(|v| v.as_str());
-            let metadata_user_id = data
-                .pointer("/metadata/user_id")
-                .and_then(|v| v.as_str());
-
-            let user_id: Option<String> = if let Some(email) = email {
-                sqlx::query_scalar("SELECT id FROM users WHERE email = ?")
-                    .bind(email)
-                    .fetch_optional(db)
-                    .await
-                    .unwrap_or(None)
-            } else {
-                None
-            };
-
-            let user_id = user_id.or_else(|| metadata_user_id.map(|s| s.to_string()));
-
-            let Some(user_id) = user_id else {
-                tracing::warn!(
-                    "subscription.active: could not resolve user (email={email:?}, metadata_user_id={metadata_user_id:?})"
-                );
-                return Ok(Json(json!({"status": "ok"})));
-            };
-
-            let customer_id = data["customer_id"].as_str().filter(|s| !s.is_empty());
-            let subscription_id = data["id"].as_str().unwrap_or_default();
-            let period_end = parse_period_end(data.get("current_period_end"));
-
-            sqlx::query(
-                "UPDATE users SET plan = 'pro', polar_customer_id = COALESCE(?, polar_customer_id),
-                 polar_subscription_id = ?,
-                 subscription_cancel_at_period_end = 0, plan_expires_at = ? WHERE id = ?",
-            )
-            .bind(customer_id)
-            .bind(subscription_id)
-            .bind(period_end)
-            .bind(&user_id)
-            .execute(db)
-            .await
-            .map_err(|e| {
-                tracing::error!("DB error on subscription.active: {e}");
-                error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
-            })?;
-
-            tracing::info!("subscription.active: user {user_id} upgraded to pro");
-        }
-
-        "subscription.canceled" => {
-            let sub_id = data["id"].as_str().unwrap_or_default();
-            let period_end = parse_period_end(data.get("current_period_end"));
-
-            sqlx::query(
-                "UPDATE users SET subscription_cancel_at_period_end = 1, plan_expires_at = ?
-                 WHERE polar_subscription_id = ?",
-            )
-            .bind(period_end)
-            .bind(sub_id)
-            .execute(db)
-            .await
-            .map_err(|e| {
-                tracing::error!("DB error on subscription.canceled: {e}");
-                error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
-            })?;
-
-            tracing::info!("subscription.canceled: sub {sub_id} marked cancel-at-period-end");
-        }
-
-        "subscription.uncanceled" => {
-            let sub_id = data["id"].as_str().unwrap_or_default();
-
-            sqlx::query(
-                "UPDATE users SET subscription_cancel_at_period_end = 0
-                 WHERE polar_subscription_id = ?",
-            )
-            .bind(sub_id)
-            .execute(db)
-            .await
-            .map_err(|e| {
-                tracing::error!("DB error on subscription.uncanceled: {e}");
-                error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
-            })?;
-
-            tracing::info!("subscription.uncanceled: sub {sub_id} reactivated");
-        }
-
-        "subscription.revoked" => {
-            let sub_id = data["id"].as_str().unwrap_or_default();
-
-            sqlx::query(
-                "UPDATE users SET plan = 'free', polar_subscription_id = NULL,
-                 plan_expires_at = NULL, subscription_cancel_at_period_end = 0
-                 WHERE polar_subscription_id = ?",
-            )
-            .bind(sub_id)
-            .execute(db)
-            .await
-            .map_err(|e| {
-                tracing::error!("DB error on subscription.revoked: {e}");
-                error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
-            })?;
-
-            tracing::info!("subscription.revoked: sub {sub_id} downgraded to free");
-        }
-
-        "subscription.updated" => {
-            let sub_id = data["id"].as_str().unwrap_or_default();
-            let period_end = parse_period_end(data.get("current_period_end"));
-
-            sqlx::query(
-                "UPDATE users SET plan_expires_at = ? WHERE polar_subscription_id = ?",
-            )
-            .bind(period_end)
-            .bind(sub_id)
-            .execute(db)
-            .await
-            .map_err(|e| {
-                tracing::error!("DB error on subscription.updated: {e}");
-                error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
-            })?;
-
-            tracing::info!("subscription.updated: sub {sub_id} period end updated");
-        }
-
+        "subscription.active" => on_subscription_active(db, data).await?,
+        "subscription.canceled" => on_subscription_canceled(db, data).await?,
+        "subscription.uncanceled" => on_subscription_uncanceled(db, data).await?,
+        "subscription.revoked" => on_subscription_revoked(db, data).await?,
+        "subscription.updated" => on_subscription_updated(db, data).await?,
         "subscription.past_due" => {
             tracing::warn!(
                 "subscription.past_due: sub {} is past due",
@@ -429,7 +289,6 @@ pub async fn webhook(
             );
             // No DB changes — just log.
         }
-
         other => {
             tracing::debug!("Unhandled webhook event type: {other}");
         }
@@ -438,6 +297,132 @@ pub async fn webhook(
     Ok(Json(json!({"status": "ok"})))
 }
 
+// ---------------------------------------------------------------------------
+// Webhook event handlers
+// ---------------------------------------------------------------------------
+
+async fn on_subscription_active(db: &SqlitePool, data: &Value) -> Result<(), Response> {
+    // Find user by customer email, or metadata.user_id fallback
+    let email = data
+        .pointer("/customer/email")
+        .and_then(|v| v.as_str());
+    let metadata_user_id = data
+        .pointer("/metadata/user_id")
+        .and_then(|v| v.as_str());
+
+    let customer_id = data["customer_id"].as_str().filter(|s| !s.is_empty());
+    let subscription_id = data["id"].as_str().unwrap_or_default();
+    let period_end = parse_period_end(data.get("current_period_end"));
+
+    // Resolve the user and upgrade them in one statement.
+    let user_id: Option<String> = sqlx::query_scalar(
+        "UPDATE users SET plan = 'pro', polar_customer_id = COALESCE(?, polar_customer_id),
+         polar_subscription_id = ?,
+         subscription_cancel_at_period_end = 0, plan_expires_at = ?
+         WHERE id = COALESCE((SELECT id FROM users WHERE email = ?), ?)
+         RETURNING id",
+    )
+    .bind(customer_id)
+    .bind(subscription_id)
+    .bind(period_end)
+    .bind(email)
+    .bind(metadata_user_id)
+    .fetch_optional(db)
+    .await
+    .map_err(|e| {
+        tracing::error!("DB error on subscription.active: {e}");
+        error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
+    })?;
+
+    match user_id {
+        Some(user_id) => tracing::info!("subscription.active: user {user_id} upgraded to pro"),
+        None => tracing::warn!(
+            "subscription.active: could not resolve user (email={email:?}, metadata_user_id={metadata_user_id:?})"
+        ),
+    }
+    Ok(())
+}
+
+async fn on_subscription_canceled(db: &SqlitePool, data: &Value) -> Result<(), Response> {
+    let sub_id = data["id"].as_str().unwrap_or_default();
+    let period_end = parse_period_end(data.get("current_period_end"));
+
+    sqlx::query(
+        "UPDATE users SET subscription_cancel_at_period_end = 1, plan_expires_at = ?
+         WHERE polar_subscription_id = ?",
+    )
+    .bind(period_end)
+    .bind(sub_id)
+    .execute(db)
+    .await
+    .map_err(|e| {
+        tracing::error!("DB error on subscription.canceled: {e}");
+        error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
+    })?;
+
+    tracing::info!("subscription.canceled: sub {sub_id} marked cancel-at-period-end");
+    Ok(())
+}
+
+async fn on_subscription_uncanceled(db: &SqlitePool, data: &Value) -> Result<(), Response> {
+    let sub_id = data["id"].as_str().unwrap_or_default();
+
+    sqlx::query(
+        "UPDATE users SET subscription_cancel_at_period_end = 0
+         WHERE polar_subscription_id = ?",
+    )
+    .bind(sub_id)
+    .execute(db)
+    .await
+    .map_err(|e| {
+        tracing::error!("DB error on subscription.uncanceled: {e}");
+        error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
+    })?;
+
+    tracing::info!("subscription.uncanceled: sub {sub_id} reactivated");
+    Ok(())
+}
+
+async fn on_subscription_revoked(db: &SqlitePool, data: &Value) -> Result<(), Response> {
+    let sub_id = data["id"].as_str().unwrap_or_default();
+
+    sqlx::query(
+        "UPDATE users SET plan = 'free', polar_subscription_id = NULL,
+         plan_expires_at = NULL, subscription_cancel_at_period_end = 0
+         WHERE polar_subscription_id = ?",
+    )
+    .bind(sub_id)
+    .execute(db)
+    .await
+    .map_err(|e| {
+        tracing::error!("DB error on subscription.revoked: {e}");
+        error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
+    })?;
+
+    tracing::info!("subscription.revoked: sub {sub_id} downgraded to free");
+    Ok(())
+}
+
+async fn on_subscription_updated(db: &SqlitePool, data: &Value) -> Result<(), Response> {
+    let sub_id = data["id"].as_str().unwrap_or_default();
+    let period_end = parse_period_end(data.get("current_period_end"));
+
+    sqlx::query(
+        "UPDATE users SET plan_expires_at = ? WHERE polar_subscription_id = ?",
+    )
+    .bind(period_end)
+    .bind(sub_id)
+    .execute(db)
+    .await
+    .map_err(|e| {
+        tracing::error!("DB error on subscription.updated: {e}");
+        error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error")
+    })?;
+
+    tracing::info!("subscription.updated: sub {sub_id} period end updated");
+    Ok(())
+}
+
 /// Parse `current_period_end` from the webhook data into a NaiveDateTime.
 /// Accepts ISO 8601 strings (e.g. "2025-05-01T00:00:00Z").
 fn parse_period_end(value: Option<&Value>) -> Option<NaiveDateTime> {
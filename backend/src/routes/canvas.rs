@@ -6,6 +6,7 @@ use axum::response::{IntoResponse, Response};
 use axum::Json;
 use chrono::NaiveDateTime;
 use serde::{Deserialize, Serialize};
+use serde_json::value::RawValue;
 use serde_json::Value;
 use uuid::Uuid;
 
@@ -118,13 +119,21 @@ struct BoxResponse {
     state: Value,
 }
 
+/// A box whose state is passed through as JSON text (from the request body or
+/// the database) rather than parsed into a `Value` and re-serialized.
+#[derive(Serialize)]
+struct RawBoxResponse {
+    box_id: i64,
+    state: Box<RawValue>,
+}
+
 #[derive(Serialize)]
 struct CanvasSnapshotResponse {
     id: String,
     name: String,
     version: i64,
     next_box_id: i64,
-    boxes: Vec<BoxResponse>,
+    boxes: Vec<RawBoxResponse>,
     created_at: String,
     updated_at: String,
 }
@@ -190,6 +199,20 @@ fn parse_state(state_str: &str) -> Value {
     serde_json::from_str(state_str).unwrap_or(Value::Object(serde_json::Map::new()))
 }
 
+/// Wrap a stored box state as raw JSON (validated, not parsed into a tree).
+/// Like [`parse_state`], invalid JSON becomes an empty object.
+fn raw_state(state_str: String) -> Box<RawValue> {
+    RawValue::from_string(state_str)
+        .unwrap_or_else(|_| RawValue::from_string("{}".to_string()).unwrap())
+}
+
+/// Serialize a box state to the compact JSON stored in the database, as raw
+/// JSON so the response can reuse it without another copy.
+fn compact_state(state: &Value) -> Result<Box<RawValue>, Response> {
+    serde_json::value::to_raw_value(state)
+        .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "JSON error"))
+}
+
 // ---------------------------------------------------------------------------
 // Canvas CRUD
 // ---------------------------------------------------------------------------
@@ -344,11 +367,11 @@ pub async fn get_canvas_snapshot(
     .await
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
-    let boxes: Vec<BoxResponse> = box_rows
-        .iter()
-        .map(|b| BoxResponse {
+    let boxes: Vec<RawBoxResponse> = box_rows
+        .into_iter()
+        .map(|b| RawBoxResponse {
             box_id: b.box_id,
-            state: parse_state(&b.state),
+            state: raw_state(b.state),
         })
         .collect();
 
@@ -382,8 +405,8 @@ pub async fn create_box(
     let canvas = get_owned_canvas(&state.db, &canvas_id, &user.id).await?;
 
     let box_id = canvas.next_box_id;
-    let state_str = serde_json::to_string(&body.state)
-        .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "JSON error"))?;
+    let box_state = compact_state(&body.state)?;
+    let state_str = box_state.get();
     if state_str.len() > MAX_BOX_STATE_BYTES {
         return Err(error_response(StatusCode::PAYLOAD_TOO_LARGE, "Box state too large"));
     }
@@ -397,7 +420,7 @@ pub async fn create_box(
     )
     .bind(&canvas.id)
     .bind(box_id)
-    .bind(&state_str)
+    .bind(state_str)
     .bind(&now)
     .bind(&now)
     .execute(&mut *tx)
@@ -417,9 +440,9 @@ pub async fn create_box(
 
     Ok((
         StatusCode::CREATED,
-        Json(BoxResponse {
+        Json(RawBoxResponse {
             box_id,
-            state: body.state,
+            state: box_state,
         }),
     )
         .into_response())
@@ -444,30 +467,29 @@ pub async fn create_boxes_batch(
 
     let now = now_sqlite();
     let mut next_id = canvas.next_box_id;
-    let mut created: Vec<BoxResponse> = Vec::with_capacity(body.boxes.len());
+    let mut created: Vec<RawBoxResponse> = Vec::with_capacity(body.boxes.len());
 
     let mut tx = state.db.begin().await
         .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
     for box_state in &body.boxes {
-        let state_str = serde_json::to_string(box_state)
-            .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "JSON error"))?;
+        let box_state = compact_state(box_state)?;
 
         sqlx::query(
             "INSERT INTO boxes (canvas_id, box_id, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
         )
         .bind(&canvas.id)
         .bind(next_id)
-        .bind(&state_str)
+        .bind(box_state.get())
         .bind(&now)
         .bind(&now)
         .execute(&mut *tx)
         .await
         .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
-        created.push(BoxResponse {
+        created.push(RawBoxResponse {
             box_id: next_id,
-            state: box_state.clone(),
+            state: box_state,
         });
         next_id += 1;
     }
@@ -827,10 +849,10 @@ async fn build_snapshot_response(
         version: canvas.version,
         next_box_id: canvas.next_box_id,
         boxes: box_rows
-            .iter()
-            .map(|b| BoxResponse {
+            .into_iter()
+            .map(|b| RawBoxResponse {
                 box_id: b.box_id,
-                state: parse_state(&b.state),
+                state: raw_state(b.state),
             })
             .collect(),
         created_at: canvas.created_at,
@@ -859,7 +881,7 @@ pub async fn create_share(
 
     let _canvas = get_owned_canvas(&state.db, &canvas_id, &user.id).await?;
 
-    let share_id = Uuid::new_v4().to_string();
+    let share_id = Uuid::now_v7().to_string();
     let share_token = Uuid::new_v4().as_simple().to_string(); // 32-char hex
     let now = now_sqlite();
 
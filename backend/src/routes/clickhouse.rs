@@ -13,7 +13,6 @@ use uuid::Uuid;
 
 use crate::auth::middleware::AuthUser;
 use crate::error::error_response;
-use crate::helpers::now_sqlite;
 use crate::AppState;
 
 // ---------------------------------------------------------------------------
@@ -22,10 +21,6 @@ use crate::AppState;
 
 #[derive(sqlx::FromRow)]
 struct ClickHouseRow {
-    #[allow(dead_code)]
-    id: String,
-    #[allow(dead_code)]
-    user_id: String,
     host: String,
     port: i64,
     username: String,
@@ -85,20 +80,18 @@ pub async fn create_connection(
     AuthUser(user): AuthUser,
     Json(body): Json<CreateConnectionRequest>,
 ) -> Result<impl IntoResponse, Response> {
-    let enc = state.encryption.as_ref()
-        .ok_or_else(|| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Encryption not configured"))?;
+    let enc = state.require_encryption()?;
 
     let (ciphertext, iv) = enc
         .encrypt(&body.password)
         .map_err(|e| error_response(StatusCode::INTERNAL_SERVER_ERROR, &format!("Encryption error: {e}")))?;
 
-    let id = Uuid::new_v4().to_string();
-    let now = now_sqlite();
+    let id = Uuid::now_v7().to_string();
 
     sqlx::query(
         "INSERT INTO clickhouse_connections
-         (id, user_id, name, host, port, database, username, password_encrypted, encryption_iv, secure, created_at, updated_at)
-         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+         (id, user_id, name, host, port, database, username, password_encrypted, encryption_iv, secure)
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
     )
     .bind(&id)
     .bind(&user.id)
@@ -110,8 +103,6 @@ pub async fn create_connection(
     .bind(&ciphertext)
     .bind(&iv)
     .bind(body.secure)
-    .bind(&now)
-    .bind(&now)
     .execute(&state.db)
     .await
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
@@ -125,8 +116,10 @@ pub async fn get_credentials(
     AuthUser(user): AuthUser,
     Path(connection_id): Path<String>,
 ) -> Result<impl IntoResponse, Response> {
+    let enc = state.require_encryption()?;
+
     let row = sqlx::query_as::<_, ClickHouseRow>(
-        "SELECT id, user_id, host, port, username, password_encrypted, encryption_iv, database, secure
+        "SELECT host, port, username, password_encrypted, encryption_iv, database, secure
          FROM clickhouse_connections WHERE id = ? AND user_id = ?",
     )
     .bind(&connection_id)
@@ -136,9 +129,6 @@ pub async fn get_credentials(
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?
     .ok_or_else(|| error_response(StatusCode::NOT_FOUND, "Connection not found"))?;
 
-    let enc = state.encryption.as_ref()
-        .ok_or_else(|| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Encryption not configured"))?;
-
     let password = enc
         .decrypt(&row.password_encrypted, &row.encryption_iv)
         .map_err(|e| error_response(StatusCode::INTERNAL_SERVER_ERROR, &format!("Decryption error: {e}")))?;
@@ -17,23 +17,14 @@ use crate::AppState;
 // Row types (sqlx::FromRow)
 // ---------------------------------------------------------------------------
 
+/// One row of the combined listing. BigQuery rows have no stored ID (it is
+/// derived from email and creation time); the others have no `created_at`.
 #[derive(sqlx::FromRow)]
-struct BigQueryRow {
-    email: String,
-    created_at: String,
-}
-
-#[derive(sqlx::FromRow)]
-struct ClickHouseListRow {
-    id: String,
-    name: String,
-    database: Option<String>,
-}
-
-#[derive(sqlx::FromRow)]
-struct SnowflakeListRow {
-    id: String,
+struct ConnectionRow {
+    flavor: String,
+    id: Option<String>,
     name: String,
+    created_at: Option<String>,
     database: Option<String>,
 }
 
@@ -55,11 +46,15 @@ struct ConnectionListResponse {
     connections: Vec<ConnectionItem>,
 }
 
-/// Parse a datetime string like "2024-01-01 12:00:00" into epoch millis for the BigQuery ID.
-fn datetime_to_epoch_millis(dt_str: &str) -> i64 {
-    chrono::NaiveDateTime::parse_from_str(dt_str, "%Y-%m-%d %H:%M:%S")
+/// Derive a BigQuery connection's ID from its email and creation time, as
+/// "bigquery-{email}-{epoch millis}". Only the exact "2024-01-01 12:00:00"
+/// format is parsed; anything else counts as 0. Clients store these IDs, so
+/// the derivation must not change.
+pub(crate) fn bigquery_connection_id(email: &str, created_at: &str) -> String {
+    let millis = chrono::NaiveDateTime::parse_from_str(created_at, "%Y-%m-%d %H:%M:%S")
         .map(|dt| dt.and_utc().timestamp_millis())
-        .unwrap_or(0)
+        .unwrap_or(0);
+    format!("bigquery-{email}-{millis}")
 }
 
 // ---------------------------------------------------------------------------
@@ -73,58 +68,67 @@ pub async fn list_connections(
 ) -> Result<impl IntoResponse, Response> {
     check_pro_or_vip(&user)?;
 
-    // Query all three connection tables concurrently.
-    let (bq_result, ch_result, sf_result) = tokio::try_join!(
-        sqlx::query_as::<_, BigQueryRow>(
-            "SELECT email, created_at FROM bigquery_connections WHERE user_id = ?",
-        )
-        .bind(&user.id)
-        .fetch_all(&state.db),
-        sqlx::query_as::<_, ClickHouseListRow>(
-            "SELECT id, name, database FROM clickhouse_connections WHERE user_id = ?",
-        )
-        .bind(&user.id)
-        .fetch_all(&state.db),
-        sqlx::query_as::<_, SnowflakeListRow>(
-            "SELECT id, name, database FROM snowflake_connections WHERE user_id = ?",
-        )
-        .bind(&user.id)
-        .fetch_all(&state.db),
+    // Read all three connection tables in one statement (one pool connection,
+    // one round trip) instead of three separate queries.
+    let rows = sqlx::query_as::<_, ConnectionRow>(
+        "SELECT 'bigquery' AS flavor, NULL AS id, email AS name, created_at, NULL AS database
+         FROM bigquery_connections WHERE user_id = ?
+         UNION ALL
+         SELECT 'clickhouse', id, name, NULL, database
+         FROM clickhouse_connections WHERE user_id = ?
+         UNION ALL
+         SELECT 'snowflake', id, name, NULL, database
+         FROM snowflake_connections WHERE user_id = ?",
     )
+    .bind(&user.id)
+    .bind(&user.id)
+    .bind(&user.id)
+    .fetch_all(&state.db)
+    .await
     .map_err(|_| error_response(StatusCode::INTERNAL_SERVER_ERROR, "Database error"))?;
 
-    let mut connections = Vec::new();
+    let connections: Vec<ConnectionItem> = rows
+        .into_iter()
+        .map(|row| match row.id {
+            Some(id) => ConnectionItem {
+                id,
+                flavor: row.flavor,
+                name: row.name,
+                email: None,
+                database: row.database,
+            },
+            None => ConnectionItem {
+                id: bigquery_connection_id(&row.name, row.created_at.as_deref().unwrap_or("")),
+                flavor: row.flavor,
+                email: Some(row.name.clone()),
+                name: row.name,
+                database: None,
+            },
+        })
+        .collect();
 
-    for bq in bq_result {
-        let millis = datetime_to_epoch_millis(&bq.created_at);
-        connections.push(ConnectionItem {
-            id: format!("bigquery-{}-{}", bq.email, millis),
-            flavor: "bigquery".to_string(),
-            name: bq.email.clone(),
-            email: Some(bq.email),
-            database: None,
-        });
-    }
-
-    for ch in ch_result {
-        connections.push(ConnectionItem {
-            id: ch.id,
-            flavor: "clickhouse".to_string(),
-            name: ch.name,
-            email: None,
-            database: ch.database,
-        });
-    }
+    Ok(Json(ConnectionListResponse { connections }))
+}
 
-    for sf in sf_result {
-        connections.push(ConnectionItem {
-            id: sf.id,
-            flavor: "snowflake".to_string(),
-            name: sf.name,
-            email: None,
-            database: sf.database,
-        });
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_bigquery_connection_id() {
+        assert_eq!(
+            bigquery_connection_id("a@b.com", "2024-01-01 12:00:00"),
+            "bigquery-a@b.com-1704110400000"
+        );
+        // Other timestamp formats have always mapped to 0.
+        assert_eq!(
+            bigquery_connection_id("a@b.com", "2024-01-01T12:00:00"),
+            "bigquery-a@b.com-0"
+        );
+        assert_eq!(
+            bigquery_connection_id("a@b.com", "2024-01-01 12:00:00.123"),
+            "bigquery-a@b.com-0"
+        );
+        assert_eq!(bigquery_connection_id("a@b.com", ""), "bigquery-a@b.com-0");
     }
-
-    Ok(Json(ConnectionListResponse { connections }))
 }
@@ -27,6 +27,7 @@ use rmcp::schemars;
 use rmcp::schemars::JsonSchema;
 
 use crate::auth::jwt::verify_session_token;
+use crate::routes::connections::bigquery_connection_id;
 use crate::routes::mcp_oauth::issuer_base;
 use crate::services::ws_manager::WsManager;
 use crate::AppState;
@@ -164,7 +165,7 @@ impl SquillMcpHandler {
         &self,
         Parameters(params): Parameters<CreateCanvasParams>,
     ) -> Result<CallToolResult, rmcp::ErrorData> {
-        let canvas_id = uuid::Uuid::new_v4().to_string();
+        let canvas_id = uuid::Uuid::now_v7().to_string();
         let now = crate::helpers::now_sqlite();
 
         let result = sqlx::query(
@@ -620,11 +621,8 @@ impl SquillMcpHandler {
         let mut connections: Vec<serde_json::Value> = Vec::new();
 
         for row in bq {
-            let millis = chrono::NaiveDateTime::parse_from_str(&row.created_at, "%Y-%m-%d %H:%M:%S")
-                .map(|dt| dt.and_utc().timestamp_millis())
-                .unwrap_or(0);
             connections.push(serde_json::json!({
-                "id": format!("bigquery-{}-{}", row.email, millis),
+                "id": bigquery_connection_id(&row.email, &row.created_at),
                 "flavor": "bigquery",
                 "name": row.email,
                 "email": row.email,
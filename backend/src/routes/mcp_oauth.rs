@@ -24,7 +24,7 @@ use sha2::{Digest, Sha256};
 use uuid::Uuid;
 
 use crate::auth::jwt::create_session_token;
-use crate::auth::middleware::{AuthUser, UserRow};
+use crate::auth::middleware::AuthUser;
 use crate::AppState;
 
 // ---------------------------------------------------------------------------
@@ -671,7 +671,7 @@ pub async fn authorize_confirm(
         return Json(ConfirmResponse { redirect_url: url }).into_response();
     }
 
-    if !is_pro_or_vip(&user) {
+    if !user.has_pro_access() {
         let _ = tx.commit().await;
         return oauth_error(
             http::StatusCode::FORBIDDEN,
@@ -726,10 +726,6 @@ pub async fn authorize_confirm(
     Json(ConfirmResponse { redirect_url: redirect }).into_response()
 }
 
-fn is_pro_or_vip(user: &UserRow) -> bool {
-    user.plan == "pro" || user.is_vip
-}
-
 // ---------------------------------------------------------------------------
 // POST /oauth/token
 // ---------------------------------------------------------------------------
@@ -907,16 +903,16 @@ async fn token_authorization_code(state: AppState, body: TokenRequest) -> Respon
     // For prod (real users), enforce Pro/VIP at exchange time too — plan
     // could have changed between consent and exchange.
     if !state.config.desktop_mode {
-        let plan_check: Option<(String, i64)> = sqlx::query_as(
-            "SELECT plan, is_vip FROM users WHERE id = ?",
+        let has_pro_access: Option<bool> = sqlx::query_scalar(
+            "SELECT is_vip OR plan = 'pro' FROM users WHERE id = ?",
         )
         .bind(&row.user_id)
         .fetch_optional(&mut *tx)
         .await
         .ok()
         .flatten();
-        match plan_check {
-            Some((plan, is_vip)) if plan == "pro" || is_vip != 0 => {}
+        match has_pro_access {
+            Some(true) => {}
             _ => {
                 let _ = tx.commit().await;
                 return oauth_error(
@@ -90,7 +90,7 @@ async fn authenticate(
 
             // Check if user owns the canvas
             let owns: bool = sqlx::query_scalar(
-                "SELECT COUNT(*) > 0 FROM canvases WHERE id = ? AND user_id = ?",
+                "SELECT EXISTS(SELECT 1 FROM canvases WHERE id = ? AND user_id = ?)",
             )
             .bind(canvas_id)
             .bind(&user.id)
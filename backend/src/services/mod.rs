@@ -1,3 +1,4 @@
 pub mod oauth;
 pub mod openai;
+pub mod polar;
 pub mod ws_manager;
@@ -1,18 +1,23 @@
 //! OpenAI service — spell caster (query rewriting) and hex remover (fix suggestions).
 //!
 //! Uses the OpenAI Responses API (`POST /v1/responses`) via `reqwest::Client`.
-//! Both functions support an in-memory LRU-style cache (HashMap with SHA-256 keys,
-//! max 5000 entries, evicts oldest on overflow).
+//! Both functions support an in-memory LRU cache (keyed by a 128-bit xxh3 hash
+//! of the request, max 5000 entries, evicts the least recently used entry).
+//! Concurrent identical requests are coalesced into a single upstream call.
 
+use std::fmt::Write as _;
+use std::future::Future;
 use std::num::NonZeroUsize;
-use std::sync::Mutex;
+use std::sync::{Mutex, OnceLock};
+use std::time::Duration;
 
 use lru::LruCache;
 use serde::{Deserialize, Serialize};
-use sha2::{Digest, Sha256};
 use tracing::error;
+use xxhash_rust::xxh3::Xxh3;
 
 use crate::config::Config;
+use crate::singleflight::KeyedLocks;
 
 // ---------------------------------------------------------------------------
 // Request / Response types
@@ -74,54 +79,99 @@ impl std::fmt::Display for AiError {
 const CACHE_MAX_SIZE: usize = 5_000;
 
 pub struct AiCache<V> {
-    inner: Mutex<LruCache<String, V>>,
+    inner: Mutex<LruCache<u128, V>>,
+    /// Per-key locks for requests currently being fetched from OpenAI.
+    inflight: KeyedLocks<u128>,
 }
 
 impl<V: Clone> AiCache<V> {
     pub fn new() -> Self {
+        Self::with_capacity(CACHE_MAX_SIZE)
+    }
+
+    pub fn with_capacity(capacity: usize) -> Self {
         Self {
             inner: Mutex::new(LruCache::new(
-                NonZeroUsize::new(CACHE_MAX_SIZE).unwrap(),
+                NonZeroUsize::new(capacity).expect("cache capacity must be non-zero"),
             )),
+            inflight: KeyedLocks::new(),
         }
     }
 
-    fn get(&self, key: &str) -> Option<V> {
-        self.inner.lock().unwrap().get(key).cloned()
+    /// Look up a cached response, marking it as most recently used.
+    fn get(&self, key: u128) -> Option<V> {
+        self.inner.lock().unwrap().get(&key).cloned()
     }
 
-    fn insert(&self, key: String, value: V) {
+    fn insert(&self, key: u128, value: V) {
         self.inner.lock().unwrap().put(key, value);
     }
-}
 
-fn sha256_key(parts: &[&str]) -> String {
-    let mut hasher = Sha256::new();
-    for (i, part) in parts.iter().enumerate() {
-        if i > 0 {
-            hasher.update(b"|");
+    /// Return the cached value for `key`, or run `fetch` and cache its result.
+    ///
+    /// Callers racing on the same key wait for the first fetch instead of each
+    /// issuing their own request. Errors are not cached, so a waiter whose
+    /// leader failed runs `fetch` itself.
+    async fn get_or_fetch<F, Fut>(&self, key: u128, fetch: F) -> Result<V, AiError>
+    where
+        F: FnOnce() -> Fut,
+        Fut: Future<Output = Result<V, AiError>>,
+    {
+        if let Some(cached) = self.get(key) {
+            return Ok(cached);
         }
+
+        let _inflight = self.inflight.lock(key).await;
+        if let Some(cached) = self.get(key) {
+            return Ok(cached);
+        }
+
+        let value = fetch().await?;
+        self.insert(key, value.clone());
+        Ok(value)
+    }
+}
+
+/// Hash the request fields into a cache key.
+///
+/// The key only needs to be collision-resistant within a 5000-entry in-process
+/// cache, so a fast non-cryptographic hash is enough. Fields are streamed into
+/// the hasher with a length prefix, so no joined copy of the query is built
+/// and `("a|b", "c")` cannot collide with `("a", "b|c")`.
+fn cache_key(parts: &[&str]) -> u128 {
+    let mut hasher = Xxh3::new();
+    for part in parts {
+        hasher.update(&(part.len() as u64).to_le_bytes());
         hasher.update(part.as_bytes());
     }
-    format!("{:x}", hasher.finalize())
+    hasher.digest128()
 }
 
 // ---------------------------------------------------------------------------
 // OpenAI Responses API types
 // ---------------------------------------------------------------------------
 
+const RESPONSES_URL: &str = "https://api.openai.com/v1/responses";
+
+/// Upper bound on a single completion. The calls are already non-blocking, but
+/// without a deadline a stalled upstream keeps the request task alive forever.
+const REQUEST_TIMEOUT: Duration = Duration::from_secs(60);
+
+// Request bodies borrow their strings: prompts, model names and JSON schemas are
+// static, so only the per-request parts are allocated.
+
 #[derive(Serialize)]
-struct ResponsesApiRequest {
-    model: String,
-    input: Vec<Message>,
+struct ResponsesApiRequest<'a> {
+    model: &'static str,
+    input: [Message<'a>; 3],
     text: TextFormat,
     temperature: f32,
 }
 
 #[derive(Serialize)]
-struct Message {
-    role: String,
-    content: String,
+struct Message<'a> {
+    role: &'static str,
+    content: &'a str,
 }
 
 #[derive(Serialize)]
@@ -132,9 +182,9 @@ struct TextFormat {
 #[derive(Serialize)]
 struct FormatSpec {
     #[serde(rename = "type")]
-    type_field: String,
-    name: String,
-    schema: serde_json::Value,
+    type_field: &'static str,
+    name: &'static str,
+    schema: &'static serde_json::Value,
     strict: bool,
 }
 
@@ -176,39 +226,42 @@ const SPELL_SYSTEM_PROMPT: &str = "\
 You are an expert SQL rewriter. The user will provide a SQL query and an instruction. \
 Modify the query according to the instruction. \
 Preserve the overall structure and formatting of the original query. \
-Return valid {dialect} SQL. \
+Return valid SQL for the dialect named in the next message. \
 Only return the rewritten query, no explanations. \
 If a SELECTED TEXT section is provided, the instruction applies specifically to that portion of the query.";
 
+/// Build the user message. The schema goes first: it is the largest part and
+/// repeats across requests on the same connection, so putting it right after
+/// the static system messages lets OpenAI's prompt cache reuse the prefix.
 fn build_spell_user_prompt(
     query: &str,
     instruction: &str,
     schema_context: Option<&str>,
     selected_text: Option<&str>,
 ) -> String {
-    let mut parts = vec![
-        format!("QUERY:\n{query}"),
-        format!("INSTRUCTION:\n{instruction}"),
-    ];
-    if let Some(sel) = selected_text {
-        parts.push(format!("SELECTED TEXT:\n{sel}"));
-    }
+    let mut parts = Vec::with_capacity(4);
     if let Some(schema) = schema_context {
         parts.push(format!("SCHEMA:\n{schema}"));
     }
+    parts.push(format!("QUERY:\n{query}"));
+    parts.push(format!("INSTRUCTION:\n{instruction}"));
+    if let Some(sel) = selected_text {
+        parts.push(format!("SELECTED TEXT:\n{sel}"));
+    }
     parts.join("\n\n")
 }
 
 /// Rewritten-query schema for the Responses API structured output.
-fn spell_json_schema() -> serde_json::Value {
-    serde_json::json!({
+fn spell_json_schema() -> &'static serde_json::Value {
+    static SCHEMA: OnceLock<serde_json::Value> = OnceLock::new();
+    SCHEMA.get_or_init(|| serde_json::json!({
         "type": "object",
         "properties": {
             "rewritten_query": { "type": "string" }
         },
         "required": ["rewritten_query"],
         "additionalProperties": false
-    })
+    }))
 }
 
 #[derive(Deserialize)]
@@ -230,17 +283,22 @@ pub async fn cast_spell(
     }
 
     // Cache lookup
-    let cache_key = sha256_key(&[
+    let key = cache_key(&[
         &request.query,
         &request.instruction,
         &request.database_dialect,
     ]);
-    if let Some(cached) = cache.get(&cache_key) {
-        return Ok(cached);
-    }
+    cache
+        .get_or_fetch(key, || fetch_spell(client, config, request))
+        .await
+}
 
-    let dialect_title = title_case(&request.database_dialect);
-    let system_prompt = SPELL_SYSTEM_PROMPT.replace("{dialect}", &dialect_title);
+async fn fetch_spell(
+    client: &reqwest::Client,
+    config: &Config,
+    request: &SpellRequest,
+) -> Result<SpellResponse, AiError> {
+    let dialect_message = format!("SQL dialect: {}", title_case(&request.database_dialect));
     let user_prompt = build_spell_user_prompt(
         &request.query,
         &request.instruction,
@@ -249,25 +307,25 @@ pub async fn cast_spell(
     );
 
     let body = ResponsesApiRequest {
-        model: "gpt-4o-mini".to_string(),
-        input: vec![
+        model: "gpt-4o-mini",
+        input: [
             Message {
-                role: "system".to_string(),
-                content: system_prompt,
+                role: "system",
+                content: SPELL_SYSTEM_PROMPT,
             },
             Message {
-                role: "system".to_string(),
-                content: format!("SQL dialect: {dialect_title}"),
+                role: "system",
+                content: &dialect_message,
             },
             Message {
-                role: "user".to_string(),
-                content: user_prompt,
+                role: "user",
+                content: &user_prompt,
             },
         ],
         text: TextFormat {
             format: FormatSpec {
-                type_field: "json_schema".to_string(),
-                name: "spell_result".to_string(),
+                type_field: "json_schema",
+                name: "spell_result",
                 schema: spell_json_schema(),
                 strict: true,
             },
@@ -276,7 +334,8 @@ pub async fn cast_spell(
     };
 
     let resp = client
-        .post("https://api.openai.com/v1/responses")
+        .post(RESPONSES_URL)
+        .timeout(REQUEST_TIMEOUT)
         .bearer_auth(&config.openai_api_key)
         .json(&body)
         .send()
@@ -320,12 +379,9 @@ pub async fn cast_spell(
         }
     })?;
 
-    let response = SpellResponse {
+    Ok(SpellResponse {
         rewritten_query: parsed.rewritten_query,
-    };
-
-    cache.insert(cache_key, response.clone());
-    Ok(response)
+    })
 }
 
 // ---------------------------------------------------------------------------
@@ -362,25 +418,27 @@ SELECT list expression references column key which is neither grouped nor aggreg
 Response:\n\
 {\"line_number\": 5, \"suggestion\": \"GROUP BY key\", \"action\": \"insert\", \"no_relevant_fix\": false}";
 
-fn prepend_line_numbers(query: &str) -> String {
-    query
-        .lines()
-        .enumerate()
-        .map(|(i, line)| format!("{}: {line}", i + 1))
-        .collect::<Vec<_>>()
-        .join("\n")
+fn prepend_line_numbers(lines: &[&str]) -> String {
+    let len: usize = lines.iter().map(|l| l.len() + 8).sum();
+    let mut out = String::with_capacity(len);
+    for (i, line) in lines.iter().enumerate() {
+        if i > 0 {
+            out.push('\n');
+        }
+        let _ = write!(out, "{}: {line}", i + 1);
+    }
+    out
 }
 
+/// Build the user message, stable context (schema, sample queries) first for
+/// the same prompt-cache reason as [`build_spell_user_prompt`].
 fn build_fix_user_prompt(
-    query: &str,
+    query_lines: &[&str],
     error_message: &str,
     schema_context: Option<&str>,
     sample_queries: Option<&str>,
 ) -> String {
-    let mut parts = vec![
-        format!("QUERY:\n{}", prepend_line_numbers(query)),
-        format!("ERROR:\n{error_message}"),
-    ];
+    let mut parts = Vec::with_capacity(4);
     if let Some(schema) = schema_context {
         parts.push(format!("SCHEMA:\n{schema}"));
     }
@@ -389,11 +447,14 @@ fn build_fix_user_prompt(
             "Here are some recent queries that ran successfully:\n\n{samples}"
         ));
     }
+    parts.push(format!("QUERY:\n{}", prepend_line_numbers(query_lines)));
+    parts.push(format!("ERROR:\n{error_message}"));
     parts.join("\n\n")
 }
 
-fn fix_json_schema() -> serde_json::Value {
-    serde_json::json!({
+fn fix_json_schema() -> &'static serde_json::Value {
+    static SCHEMA: OnceLock<serde_json::Value> = OnceLock::new();
+    SCHEMA.get_or_init(|| serde_json::json!({
         "type": "object",
         "properties": {
             "line_number": { "type": "integer" },
@@ -403,7 +464,7 @@ fn fix_json_schema() -> serde_json::Value {
         },
         "required": ["line_number", "suggestion", "action", "no_relevant_fix"],
         "additionalProperties": false
-    })
+    }))
 }
 
 #[derive(Deserialize)]
@@ -434,43 +495,51 @@ pub async fn suggest_fix(
     }
 
     // Cache lookup
-    let cache_key = sha256_key(&[
+    let key = cache_key(&[
         &request.query,
         &request.error_message,
         &request.database_dialect,
     ]);
-    if let Some(cached) = cache.get(&cache_key) {
-        return Ok(cached);
-    }
+    cache
+        .get_or_fetch(key, || fetch_fix(client, config, request))
+        .await
+}
 
-    let dialect_title = title_case(&request.database_dialect);
+async fn fetch_fix(
+    client: &reqwest::Client,
+    config: &Config,
+    request: &FixRequest,
+) -> Result<FixResponse, AiError> {
+    // Split once: the lines feed both the numbered prompt and the `original` lookup.
+    let lines: Vec<&str> = request.query.lines().collect();
+    let dialect_message = format!("SQL dialect: {}", title_case(&request.database_dialect));
     let user_prompt = build_fix_user_prompt(
-        &request.query,
+        &lines,
         &request.error_message,
         request.schema_context.as_deref(),
         request.sample_queries.as_deref(),
     );
 
     let body = ResponsesApiRequest {
-        model: "gpt-4.1".to_string(),
-        input: vec![
+        model: "gpt-4.1",
+        input: [
             Message {
-                role: "system".to_string(),
-                content: FIXER_SYSTEM_PROMPT.to_string(),
+                role: "system",
+                content: FIXER_SYSTEM_PROMPT,
             },
             Message {
-                role: "system".to_string(),
-                content: format!("SQL dialect: {dialect_title}"),
+                role: "system",
+                content: &dialect_message,
             },
             Message {
-                role: "user".to_string(),
-                content: user_prompt,
+                role: "user",
+                content: &user_prompt,
             },
         ],
         text: TextFormat {
             format: FormatSpec {
-                type_field: "json_schema".to_string(),
-                name: "fix_result".to_string(),
+                type_field: "json_schema",
+                name: "fix_result",
                 schema: fix_json_schema(),
                 strict: true,
             },
@@ -479,7 +548,8 @@ pub async fn suggest_fix(
     };
 
     let resp = client
-        .post("https://api.openai.com/v1/responses")
+        .post(RESPONSES_URL)
+        .timeout(REQUEST_TIMEOUT)
         .bearer_auth(&config.openai_api_key)
         .json(&body)
         .send()
@@ -539,12 +609,10 @@ pub async fn suggest_fix(
                 status_code: 422,
             });
         }
-        let lines: Vec<&str> = request.query.lines().collect();
-        let original = if (parsed.line_number as usize) <= lines.len() {
-            lines[parsed.line_number as usize - 1].to_string()
-        } else {
-            String::new()
-        };
+        let original = lines
+            .get(parsed.line_number as usize - 1)
+            .map(|line| line.to_string())
+            .unwrap_or_default();
 
         FixResponse {
             line_number: parsed.line_number,
@@ -556,7 +624,6 @@ pub async fn suggest_fix(
         }
     };
 
-    cache.insert(cache_key, response.clone());
     Ok(response)
 }
 
@@ -582,9 +649,11 @@ mod tests {
     use super::*;
 
     #[test]
-    fn test_sha256_key() {
-        let key = sha256_key(&["hello", "world"]);
-        assert_eq!(key.len(), 64); // SHA-256 hex digest
+    fn test_cache_key() {
+        let key = cache_key(&["hello", "world"]);
+        assert_eq!(key, cache_key(&["hello", "world"]));
+        assert_ne!(key, cache_key(&["hello", "there"]));
+        assert_ne!(cache_key(&["a|b", "c"]), cache_key(&["a", "b|c"]));
     }
 
     #[test]
@@ -596,17 +665,52 @@ mod tests {
 
     #[test]
     fn test_prepend_line_numbers() {
-        let result = prepend_line_numbers("SELECT *\nFROM table");
+        let result = prepend_line_numbers(&["SELECT *", "FROM table"]);
         assert_eq!(result, "1: SELECT *\n2: FROM table");
     }
 
     #[test]
     fn test_cache() {
         let cache: AiCache<String> = AiCache::new();
-        assert!(cache.get("missing").is_none());
+        assert!(cache.get(0).is_none());
+
+        cache.insert(1, "value1".to_string());
+        assert_eq!(cache.get(1), Some("value1".to_string()));
+    }
+
+    #[test]
+    fn test_cache_evicts_least_recently_used() {
+        let cache: AiCache<&str> = AiCache::with_capacity(2);
+        cache.insert(1, "a");
+        cache.insert(2, "b");
+
+        // Reading key 1 makes key 2 the eviction candidate.
+        assert_eq!(cache.get(1), Some("a"));
+        cache.insert(3, "c");
+
+        assert_eq!(cache.get(1), Some("a"));
+        assert!(cache.get(2).is_none());
+        assert_eq!(cache.get(3), Some("c"));
+    }
+
+    #[tokio::test]
+    async fn test_cache_coalesces_concurrent_fetches() {
+        use std::sync::atomic::{AtomicUsize, Ordering};
+
+        let cache: AiCache<String> = AiCache::new();
+        let counter = AtomicUsize::new(0);
+        let calls = &counter;
+        let fetch = move || async move {
+            calls.fetch_add(1, Ordering::SeqCst);
+            tokio::time::sleep(Duration::from_millis(10)).await;
+            Ok("value".to_string())
+        };
 
-        cache.insert("key1".to_string(), "value1".to_string());
-        assert_eq!(cache.get("key1"), Some("value1".to_string()));
+        let (a, b) = tokio::join!(cache.get_or_fetch(7, fetch), cache.get_or_fetch(7, fetch));
+        assert_eq!(a.unwrap(), "value");
+        assert_eq!(b.unwrap(), "value");
+        assert_eq!(counter.load(Ordering::SeqCst), 1);
+        assert!(cache.inflight.is_empty());
     }
 
     #[test]
@@ -617,12 +721,12 @@ mod tests {
 
         let prompt_with_schema =
             build_spell_user_prompt("SELECT 1", "add column", Some("table(id int)"), None);
-        assert!(prompt_with_schema.contains("SCHEMA:\ntable(id int)"));
+        assert!(prompt_with_schema.starts_with("SCHEMA:\ntable(id int)"));
     }
 
     #[test]
     fn test_fix_user_prompt() {
-        let prompt = build_fix_user_prompt("SELECT *\nFROM t", "error", None, None);
+        let prompt = build_fix_user_prompt(&["SELECT *", "FROM t"], "error", None, None);
         assert!(prompt.contains("1: SELECT *"));
         assert!(prompt.contains("2: FROM t"));
         assert!(prompt.contains("ERROR:\nerror"));
@@ -0,0 +1,57 @@
+//! Polar API client.
+//!
+//! The base URL and `Authorization` header depend only on configuration, so
+//! they are resolved once at startup instead of on every billing request.
+
+use std::time::Duration;
+
+use reqwest::header::{HeaderValue, AUTHORIZATION};
+use reqwest::{Client, RequestBuilder};
+
+/// Deadline for a single Polar API call. Requests go through the shared,
+/// pooled HTTP client, which has no timeout of its own.
+const REQUEST_TIMEOUT: Duration = Duration::from_secs(10);
+
+pub struct PolarApi {
+    client: Client,
+    base_url: &'static str,
+    auth: Option<HeaderValue>,
+}
+
+impl PolarApi {
+    pub fn new(access_token: &str, server: &str, client: Client) -> Self {
+        let base_url = if server == "sandbox" {
+            "https://sandbox-api.polar.sh"
+        } else {
+            "https://api.polar.sh"
+        };
+        let auth = HeaderValue::from_str(&format!("Bearer {access_token}"))
+            .map(|mut value| {
+                value.set_sensitive(true);
+                value
+            })
+            .map_err(|_| tracing::warn!("POLAR_ACCESS_TOKEN is not a valid header value"))
+            .ok();
+        Self {
+            client,
+            base_url,
+            auth,
+        }
+    }
+
+    pub fn post(&self, path: &str) -> RequestBuilder {
+        self.authorize(self.client.post(format!("{}{path}", self.base_url)))
+    }
+
+    pub fn patch(&self, path: &str) -> RequestBuilder {
+        self.authorize(self.client.patch(format!("{}{path}", self.base_url)))
+    }
+
+    fn authorize(&self, request: RequestBuilder) -> RequestBuilder {
+        let request = request.timeout(REQUEST_TIMEOUT);
+        match &self.auth {
+            Some(auth) => request.header(AUTHORIZATION, auth.clone()),
+            None => request,
+        }
+    }
+}
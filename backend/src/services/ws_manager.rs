@@ -1,6 +1,6 @@
 //! In-memory WebSocket connection manager for real-time canvas collaboration.
 
-use axum::extract::ws::Message;
+use axum::extract::ws::{Message, Utf8Bytes};
 use serde::Serialize;
 use std::collections::HashMap;
 use std::sync::Mutex;
@@ -62,11 +62,13 @@ impl WsManager {
     pub fn broadcast(&self, canvas_id: &str, message_json: &str, exclude_client_id: Option<&str>) {
         let rooms = self.rooms.lock().unwrap();
         if let Some(room) = rooms.get(canvas_id) {
+            // Copy the payload once; each recipient gets a refcounted handle.
+            let payload = Utf8Bytes::from(message_json);
             for (cid, info) in room {
                 if exclude_client_id == Some(cid.as_str()) {
                     continue;
                 }
-                if info.tx.send(Message::Text(message_json.into())).is_err() {
+                if info.tx.send(Message::Text(payload.clone())).is_err() {
                     warn!("Failed to send to client {cid} in canvas {canvas_id}");
                 }
             }
@@ -0,0 +1,86 @@
+//! Per-key async locks for collapsing duplicate concurrent work.
+//!
+//! Used to make "check cache → fetch → fill cache" paths single-flight: the
+//! first caller for a key does the work while later callers for the same key
+//! wait, then find the result in the cache.
+
+use std::collections::HashMap;
+use std::hash::Hash;
+use std::sync::{Arc, Mutex};
+
+use tokio::sync::OwnedMutexGuard;
+
+type Lock = Arc<tokio::sync::Mutex<()>>;
+
+/// A set of async mutexes created on demand per key and dropped once no
+/// caller holds or waits on them.
+pub struct KeyedLocks<K> {
+    locks: Mutex<HashMap<K, Lock>>,
+}
+
+impl<K: Eq + Hash + Clone> KeyedLocks<K> {
+    pub fn new() -> Self {
+        Self {
+            locks: Mutex::new(HashMap::new()),
+        }
+    }
+
+    /// Wait for exclusive access to `key`. Released when the guard is dropped.
+    pub async fn lock(&self, key: K) -> KeyedLockGuard<'_, K> {
+        let entry = Entry::acquire(self, key);
+        let permit = entry.lock.clone().lock_owned().await;
+        KeyedLockGuard {
+            _permit: permit,
+            _entry: entry,
+        }
+    }
+
+    /// Whether no key is currently held or waited on.
+    pub fn is_empty(&self) -> bool {
+        self.locks.lock().unwrap().is_empty()
+    }
+}
+
+impl<K: Eq + Hash + Clone> Default for KeyedLocks<K> {
+    fn default() -> Self {
+        Self::new()
+    }
+}
+
+/// Holds the lock for one key. Fields drop in order: the permit is released
+/// before the entry checks whether anyone else still needs the map slot.
+pub struct KeyedLockGuard<'a, K: Eq + Hash + Clone> {
+    _permit: OwnedMutexGuard<()>,
+    _entry: Entry<'a, K>,
+}
+
+/// A caller's reference to a key's lock. Dropping the last one removes the key
+/// from the map, including when the caller is cancelled while waiting.
+struct Entry<'a, K: Eq + Hash + Clone> {
+    owner: &'a KeyedLocks<K>,
+    key: K,
+    lock: Lock,
+}
+
+impl<'a, K: Eq + Hash + Clone> Entry<'a, K> {
+    fn acquire(owner: &'a KeyedLocks<K>, key: K) -> Self {
+        let lock = owner
+            .locks
+            .lock()
+            .unwrap()
+            .entry(key.clone())
+            .or_default()
+            .clone();
+        Self { owner, key, lock }
+    }
+}
+
+impl<K: Eq + Hash + Clone> Drop for Entry<'_, K> {
+    fn drop(&mut self) {
+        let mut locks = self.owner.locks.lock().unwrap();
+        // One reference is held by the map and one by this entry.
+        if Arc::strong_count(&self.lock) <= 2 {
+            locks.remove(&self.key);
+        }
+    }
+}
@@ -7,7 +7,7 @@ use sha2::{Digest, Sha256};
 use sqlx::SqlitePool;
 
 /// Hash a raw JWT string for storage in the revocation table.
-fn hash_token(token: &str) -> String {
+pub fn hash_token(token: &str) -> String {
     let mut hasher = Sha256::new();
     hasher.update(token.as_bytes());
     format!("{:x}", hasher.finalize())
@@ -30,19 +30,6 @@ pub async fn revoke_token(
     Ok(())
 }
 
-/// Check whether a token has been revoked.
-pub async fn is_token_revoked(db: &SqlitePool, token: &str) -> bool {
-    let token_hash = hash_token(token);
-    sqlx::query_scalar::<_, i32>(
-        "SELECT COUNT(*) FROM revoked_tokens WHERE token_hash = ?",
-    )
-    .bind(&token_hash)
-    .fetch_one(db)
-    .await
-    .unwrap_or(0)
-        > 0
-}
-
 /// Delete revoked tokens whose JWT has already expired (cleanup).
 pub async fn cleanup_expired_revocations(db: &SqlitePool) -> Result<u64, sqlx::Error> {
     let result = sqlx::query(
@@ -4,9 +4,6 @@ mod secure_store;
 
 use oauth::{get_oauth_env_overrides, start_oauth_flow};
 use secure_store::{delete_secret, load_secret, save_secret};
-use squill_server::rate_limit::RateLimiter;
-use squill_server::services::ws_manager::WsManager;
-use std::sync::Arc;
 use tauri::Manager;
 
 /// Port for the embedded backend server.
@@ -53,7 +50,6 @@ fn start_backend_server(app_data_dir: std::path::PathBuf) {
             std::fs::create_dir_all(&app_data_dir).ok();
 
             let db_path = app_data_dir.join("squill.db");
-            let db_url = format!("sqlite:{}", db_path.display());
 
             tracing::info!("Desktop backend: database at {}", db_path.display());
 
@@ -61,11 +57,11 @@ fn start_backend_server(app_data_dir: std::path::PathBuf) {
             dotenvy::dotenv().ok();
 
             let config = squill_server::config::Config::from_env_with_overrides(
-                &db_url,
+                &db_path,
                 true, // test_mode = false for desktop, but no billing needed
             );
 
-            let pool = squill_server::db::create_pool(&db_url)
+            let pool = squill_server::db::create_pool(&config)
                 .await
                 .expect("Failed to create database pool");
 
@@ -73,15 +69,7 @@ fn start_backend_server(app_data_dir: std::path::PathBuf) {
                 .await
                 .expect("Failed to ensure MCP local user");
 
-            let state = squill_server::AppState {
-                db: pool,
-                config: Arc::new(config),
-                ws_manager: Arc::new(WsManager::new()),
-                encryption: None,
-                http_client: reqwest::Client::new(),
-                rate_limiter: Arc::new(RateLimiter::new(20, 60)),
-                general_rate_limiter: Arc::new(RateLimiter::new(200, 60)),
-            };
+            let state = squill_server::AppState::new(pool, config, None);
 
             let app = squill_server::build_app(state);
             let listener = tokio::net::TcpListener::bind(format!("127.0.0.1:{BACKEND_PORT}"))
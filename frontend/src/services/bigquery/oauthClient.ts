@@ -26,6 +26,11 @@ import type {
 
 const BQ_BASE = 'https://bigquery.googleapis.com/bigquery/v2'
 
+/** Upper bound on remembered page tokens (abandoned result sets are never consumed). */
+const MAX_TRACKED_PAGE_TOKENS = 100
+
+type JobReference = NonNullable<BigQueryQueryResponse['jobReference']>
+
 function extractTableMetadata(data: BigQueryTableDetail): TableMetadataInfo {
   return {
     rowCount: data.numRows ? parseInt(data.numRows, 10) : null,
@@ -55,7 +60,7 @@ export function createOAuthClient(connectionId: string): BigQueryClient {
     let token = await getToken()
     let response = await makeRequest(token)
     if (response.status === 401) {
-      token = await connectionsStore.refreshAccessToken(connectionId)
+      token = await connectionsStore.refreshAccessToken(connectionId, token)
       response = await makeRequest(token)
     }
     return response
@@ -121,6 +126,39 @@ export function createOAuthClient(connectionId: string): BigQueryClient {
     }
   }
 
+  /**
+   * Job that issued each outstanding page token. Follow-up pages are read from
+   * that job's results instead of submitting the query again.
+   */
+  const jobsByPageToken = new Map<string, JobReference>()
+
+  function rememberPageToken(pageToken: string, job: JobReference) {
+    if (jobsByPageToken.size >= MAX_TRACKED_PAGE_TOKENS) {
+      const oldest = jobsByPageToken.keys().next().value
+      if (oldest !== undefined) jobsByPageToken.delete(oldest)
+    }
+    jobsByPageToken.set(pageToken, job)
+  }
+
+  /** Fetch one page of a completed job's results via jobs.getQueryResults. */
+  async function fetchResultsPage(
+    job: JobReference,
+    pageToken: string,
+    maxResults: number,
+    signal: AbortSignal | null,
+  ): Promise<BigQueryQueryResponse> {
+    const params = new URLSearchParams({ pageToken, maxResults: String(maxResults) })
+    if (job.location) params.set('location', job.location)
+
+    return apiCall<BigQueryQueryResponse>(token => {
+      const fetchOptions: RequestInit = {
+        headers: { Authorization: `Bearer ${token}` },
+      }
+      if (signal) fetchOptions.signal = signal
+      return fetch(`${BQ_BASE}/projects/${job.projectId}/queries/${job.jobId}?${params}`, fetchOptions)
+    })
+  }
+
   /**
    * Submit a query to jobs.query, handle 401-retry, and poll if the job didn't
    * complete synchronously. Shared by runQuery / runQueryPaginated / dryRunQuery.
@@ -228,16 +266,23 @@ export function createOAuthClient(connectionId: string): BigQueryClient {
       const maxResults = options.maxResults ?? 5000
       const signal = options.signal ?? null
 
-      const body: Record<string, unknown> = {
-        query,
-        useLegacySql: false,
-        useQueryCache: true,
-        maxResults,
-        formatOptions: { useInt64Timestamp: false },
+      let data: BigQueryQueryResponse
+      const job = options.pageToken ? jobsByPageToken.get(options.pageToken) : undefined
+      if (job && options.pageToken) {
+        jobsByPageToken.delete(options.pageToken)
+        data = await fetchResultsPage(job, options.pageToken, maxResults, signal)
+      } else {
+        const body: Record<string, unknown> = {
+          query,
+          useLegacySql: false,
+          useQueryCache: true,
+          maxResults,
+          formatOptions: { useInt64Timestamp: false },
+        }
+        if (options.pageToken) body.pageToken = options.pageToken
+        data = await submitQuery(projectId, body, signal, maxResults)
       }
-      if (options.pageToken) body.pageToken = options.pageToken
-
-      const data = await submitQuery(projectId, body, signal, maxResults)
+      if (data.pageToken && data.jobReference) rememberPageToken(data.pageToken, data.jobReference)
 
       const stats = {
         totalBytesProcessed: data.totalBytesProcessed || '0',
@@ -55,35 +55,50 @@ interface ClickHouseJSONResponse {
   meta: { name: string; type: string }[]
   data: Record<string, unknown>[]
   rows: number
+  rows_before_limit_at_least?: number
   statistics: { elapsed: number; rows_read: number; bytes_read: number }
 }
 
+interface ClickHouseCompactResponse extends Omit<ClickHouseJSONResponse, 'data'> {
+  data: unknown[][]
+}
+
+/** Quote a ClickHouse identifier with backticks, escaping embedded ones. */
+function quoteIdentifier(name: string): string {
+  return `\`${name.replace(/\\/g, '\\\\').replace(/`/g, '\\`')}\``
+}
+
 /**
  * Create a ClickHouse HTTP client for the given credentials.
  */
 export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
   const { host, port, username, password, database, secure } = credentials
   const baseUrl = `${secure ? 'https' : 'http'}://${host}:${port}`
-  const authHeader = `Basic ${btoa(`${username}:${password}`)}`
+  // Per-connection headers, built once; each request only adds its format
+  const connectionHeaders: Record<string, string> = {
+    'Authorization': `Basic ${btoa(`${username}:${password}`)}`,
+  }
+  if (database) {
+    connectionHeaders['X-ClickHouse-Database'] = database
+  }
 
   /**
    * Execute a SQL query against ClickHouse and return parsed JSON response.
+   * `settings` are passed in the URL: ClickHouse settings, or `param_<name>`
+   * values for `{name:Type}` query parameters.
    */
-  async function query(
+  async function query<T = ClickHouseJSONResponse>(
     sql: string,
     signal?: AbortSignal | null,
-  ): Promise<ClickHouseJSONResponse> {
-    const headers: Record<string, string> = {
-      'Authorization': authHeader,
-      'X-ClickHouse-Format': 'JSON',
-    }
-    if (database) {
-      headers['X-ClickHouse-Database'] = database
-    }
+    settings?: Record<string, string>,
+    format: 'JSON' | 'JSONCompact' = 'JSON',
+  ): Promise<T> {
+    const headers = { ...connectionHeaders, 'X-ClickHouse-Format': format }
 
     let response: Response
     try {
-      response = await fetch(baseUrl, {
+      const url = settings ? `${baseUrl}/?${new URLSearchParams(settings)}` : baseUrl
+      response = await fetch(url, {
         method: 'POST',
         headers,
         body: sql,
@@ -109,6 +124,28 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
     return response.json()
   }
 
+  /**
+   * Like `query`, but fetches JSONCompact (column names once, rows as arrays)
+   * and builds the row objects locally. The JSON format repeats every column
+   * name in every row, which dominates the payload for wide result sets.
+   */
+  async function queryRows(
+    sql: string,
+    signal?: AbortSignal | null,
+    settings?: Record<string, string>,
+  ): Promise<ClickHouseJSONResponse> {
+    const compact = await query<ClickHouseCompactResponse>(sql, signal, settings, 'JSONCompact')
+    const names = compact.meta.map(m => m.name)
+    const data: Record<string, unknown>[] = new Array(compact.data.length)
+    for (let r = 0; r < compact.data.length; r++) {
+      const values = compact.data[r]
+      const row: Record<string, unknown> = {}
+      for (let c = 0; c < names.length; c++) row[names[c]] = values[c]
+      data[r] = row
+    }
+    return { ...compact, data }
+  }
+
   return {
     /**
      * Test the connection by running SELECT 1.
@@ -133,7 +170,7 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
       signal?: AbortSignal | null,
     ): Promise<ClickHouseQueryResult> {
       const start = performance.now()
-      const data = await query(sql, signal)
+      const data = await queryRows(sql, signal)
       return {
         rows: data.data,
         schema: data.meta.map(m => ({ name: m.name, type: m.type })),
@@ -146,7 +183,9 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
 
     /**
      * Execute a query with LIMIT/OFFSET pagination.
-     * On first call (offset=0), also runs a COUNT query for total rows.
+     * On first call (offset=0), also reports the total row count. ClickHouse
+     * computes it in the same pass (rows_before_limit_at_least); a separate
+     * COUNT query is only a fallback.
      */
     async runQueryPaginated(
       sql: string,
@@ -158,16 +197,43 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
       const start = performance.now()
 
       // Fetch the page
+      const wantCount = includeCount && offset === 0
       const paginatedSql = `SELECT * FROM (${sql}) AS _sq LIMIT ${batchSize} OFFSET ${offset}`
-      const data = await query(paginatedSql, signal)
+      let data: ClickHouseJSONResponse
+      // rows_before_limit_at_least is only exact while the setting is applied
+      let exactRowsBeforeLimit = wantCount
+      try {
+        data = await queryRows(
+          paginatedSql,
+          signal,
+          wantCount ? { exact_rows_before_limit: '1' } : undefined,
+        )
+      } catch (err) {
+        // readonly=1 users may not change settings; fall back to a plain query
+        // only when it is our setting that was refused (Code 164, READONLY),
+        // not the user's own statement, which would just fail again
+        const settingRefused = err instanceof Error
+          && /\bCode: 164\b/.test(err.message)
+          && err.message.includes('exact_rows_before_limit')
+        if (!wantCount || !settingRefused) throw err
+        exactRowsBeforeLimit = false
+        data = await queryRows(paginatedSql, signal)
+      }
 
       // Optionally get total count
       let totalRows: number | null = null
-      if (includeCount && offset === 0) {
+      if (exactRowsBeforeLimit && data.rows_before_limit_at_least != null) {
+        totalRows = Number(data.rows_before_limit_at_least)
+      } else if (wantCount && data.rows < batchSize) {
+        // A partial first batch is the whole result; no COUNT needed
+        totalRows = data.rows
+      } else if (wantCount) {
         try {
           const countData = await query(`SELECT count() AS cnt FROM (${sql}) AS _sq`, signal)
           totalRows = Number(countData.data[0]?.cnt ?? 0)
-        } catch {
+        } catch (err) {
+          // Cancellation must still reach the caller
+          if (err instanceof DOMException && err.name === 'AbortError') throw err
           // Count failed — proceed without total
         }
       }
@@ -202,15 +268,18 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
      * List all tables across all user databases.
      */
     async fetchTables(): Promise<ClickHouseTableInfo[]> {
-      const data = await query(
+      const data = await query<ClickHouseCompactResponse>(
         `SELECT database, name, engine FROM system.tables
          WHERE database NOT IN ('system', 'INFORMATION_SCHEMA', 'information_schema')
          ORDER BY database, name`,
+        null,
+        undefined,
+        'JSONCompact',
       )
-      return data.data.map(row => ({
-        databaseName: String(row.database),
-        name: String(row.name),
-        type: (String(row.engine).toLowerCase().includes('view') ? 'view' : 'table') as 'table' | 'view',
+      return data.data.map(([database, name, engine]) => ({
+        databaseName: String(database),
+        name: String(name),
+        type: (String(engine).toLowerCase().includes('view') ? 'view' : 'table') as 'table' | 'view',
       }))
     },
 
@@ -221,7 +290,7 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
       databaseName: string,
       tableName: string,
     ): Promise<ClickHouseColumnInfo[]> {
-      const data = await query(`DESCRIBE TABLE \`${databaseName}\`.\`${tableName}\``)
+      const data = await query(`DESCRIBE TABLE ${quoteIdentifier(databaseName)}.${quoteIdentifier(tableName)}`)
       return data.data.map(row => ({
         name: String(row.name),
         type: String(row.type),
@@ -234,21 +303,33 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
      * Returns a map of "database.table" -> columns.
      */
     async fetchAllColumns(): Promise<Record<string, ClickHouseColumnInfo[]>> {
-      const data = await query(
+      // Compact rows: positional values, no per-row key objects to build
+      const data = await query<ClickHouseCompactResponse>(
         `SELECT database, table, name, type
          FROM system.columns
          WHERE database NOT IN ('system', 'INFORMATION_SCHEMA', 'information_schema')
          ORDER BY database, table, position`,
+        null,
+        undefined,
+        'JSONCompact',
       )
 
       const result: Record<string, ClickHouseColumnInfo[]> = {}
-      for (const row of data.data) {
-        const key = `${row.database}.${row.table}`
-        if (!result[key]) result[key] = []
-        result[key].push({
-          name: String(row.name),
-          type: String(row.type),
-          nullable: String(row.type).startsWith('Nullable'),
+      // Rows are ordered by table, so consecutive rows share a bucket
+      let key = ''
+      let bucket: ClickHouseColumnInfo[] = []
+      for (const [database, table, name, type] of data.data) {
+        const rowKey = `${database}.${table}`
+        if (rowKey !== key) {
+          key = rowKey
+          if (!result[key]) result[key] = []
+          bucket = result[key]
+        }
+        const typeName = String(type)
+        bucket.push({
+          name: String(name),
+          type: typeName,
+          nullable: typeName.startsWith('Nullable'),
         })
       }
       return result
@@ -264,7 +345,9 @@ export function createClickHouseHttpClient(credentials: ClickHouseCredentials) {
       const data = await query(
         `SELECT total_rows, total_bytes, engine
          FROM system.tables
-         WHERE database = '${databaseName}' AND name = '${tableName}'`,
+         WHERE database = {database:String} AND name = {table:String}`,
+        null,
+        { param_database: databaseName, param_table: tableName },
       )
       const row = data.data[0]
       return {
@@ -69,6 +69,75 @@ interface SFStatementResponse {
   createdOn?: number
 }
 
+// Per-database metadata queries run in parallel, up to this many at a time
+const METADATA_CONCURRENCY = 8
+
+// Shared databases hidden from the schema browser
+const SYSTEM_DATABASES = ['SNOWFLAKE', 'SNOWFLAKE_SAMPLE_DATA']
+
+// SHOW commands return at most this many rows
+const SHOW_ROW_LIMIT = 10_000
+
+/**
+ * Whether a SHOW response holds its whole result. executeStatement returns
+ * only the first partition, and SHOW output is capped, so a full page or a
+ * partitioned result may be missing rows.
+ */
+function isCompleteShowResult(resp: SFStatementResponse): boolean {
+  const rows = resp.data?.length ?? 0
+  const meta = resp.resultSetMetaData
+  if (rows >= SHOW_ROW_LIMIT) return false
+  if ((meta?.partitionInfo?.length ?? 1) > 1) return false
+  return meta?.numRows == null || rows >= meta.numRows
+}
+
+// SHOW COLUMNS reports internal type names; map them to the names
+// INFORMATION_SCHEMA.COLUMNS uses so both paths agree
+const SHOW_COLUMN_TYPES: Record<string, string> = {
+  FIXED: 'NUMBER',
+  REAL: 'FLOAT',
+}
+
+/**
+ * Map `items` through `fn` with at most `limit` calls in flight, keeping order.
+ */
+async function mapConcurrent<T, R>(
+  items: T[],
+  limit: number,
+  fn: (item: T) => Promise<R>,
+): Promise<R[]> {
+  const results: R[] = new Array(items.length)
+  let next = 0
+  const worker = async () => {
+    while (next < items.length) {
+      const i = next++
+      results[i] = await fn(items[i])
+    }
+  }
+  await Promise.all(Array.from({ length: Math.min(limit, items.length) }, worker))
+  return results
+}
+
+/** Plain code-unit comparison, close to Snowflake's default binary collation. */
+function compareStrings(a: string, b: string): number {
+  return a < b ? -1 : a > b ? 1 : 0
+}
+
+/**
+ * Order tables by database, schema, then name, so every listing path
+ * returns the same order.
+ */
+function compareTables(a: SnowflakeTableInfo, b: SnowflakeTableInfo): number {
+  return compareStrings(a.databaseName, b.databaseName)
+    || compareStrings(a.schemaName, b.schemaName)
+    || compareStrings(a.name, b.name)
+}
+
+/** Quote a Snowflake identifier with double quotes, escaping embedded ones. */
+function quoteIdentifier(name: string): string {
+  return `"${name.replace(/"/g, '""')}"`
+}
+
 /**
  * Create a Snowflake REST client for the given credentials.
  */
@@ -76,6 +145,7 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
   const { account, username, password, warehouse, database, schemaName, role } = credentials
   const baseUrl = `https://${account}.snowflakecomputing.com`
   let sessionToken: string | null = null
+  let pendingLogin: Promise<void> | null = null
 
   /**
    * Authenticate with username/password to get a session token.
@@ -121,55 +191,68 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
    * Ensure we have a valid session token.
    */
   async function ensureAuth(): Promise<string> {
-    if (!sessionToken) await login()
+    if (!sessionToken) {
+      // Concurrent statements (e.g. parallel metadata scans) share one login
+      if (!pendingLogin) {
+        pendingLogin = login().finally(() => {
+          pendingLogin = null
+        })
+      }
+      await pendingLogin
+    }
     return sessionToken!
   }
 
+  /**
+   * Headers for SQL API calls authenticated with a session token.
+   */
+  function authHeaders(token: string): Record<string, string> {
+    return {
+      'Authorization': `Snowflake Token="${token}"`,
+      'Accept': 'application/json',
+      'X-Snowflake-Authorization-Token-Type': 'SNOWFLAKE',
+    }
+  }
+
   /**
    * Execute a SQL statement via the SQL REST API.
    * Handles 202 (async) responses by polling.
+   * `bindings` fill the statement's `?` placeholders in order, as text.
    */
   async function executeStatement(
     sql: string,
     signal?: AbortSignal | null,
+    bindings?: string[],
   ): Promise<SFStatementResponse> {
     const token = await ensureAuth()
 
     const body: Record<string, unknown> = { statement: sql, timeout: 60 }
+    if (bindings?.length) {
+      body.bindings = Object.fromEntries(
+        bindings.map((value, i) => [String(i + 1), { type: 'TEXT', value }]),
+      )
+    }
     if (warehouse) body.warehouse = warehouse
     if (database) body.database = database
     if (schemaName) body.schema = schemaName
     if (role) body.role = role
 
+    const payload = JSON.stringify(body)
+    const post = (authToken: string) => fetch(`${baseUrl}/api/v2/statements`, {
+      method: 'POST',
+      headers: { ...authHeaders(authToken), 'Content-Type': 'application/json' },
+      body: payload,
+      signal: signal ?? undefined,
+    })
+
     let response: Response
     try {
-      response = await fetch(`${baseUrl}/api/v2/statements`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Snowflake Token="${token}"`,
-          'Content-Type': 'application/json',
-          'Accept': 'application/json',
-          'X-Snowflake-Authorization-Token-Type': 'SNOWFLAKE',
-        },
-        body: JSON.stringify(body),
-        signal: signal ?? undefined,
-      })
+      response = await post(token)
     } catch (err) {
       if (err instanceof DOMException && err.name === 'AbortError') throw err
       // Re-try once after re-login (token may have expired)
       sessionToken = null
-      const freshToken = await ensureAuth()
-      response = await fetch(`${baseUrl}/api/v2/statements`, {
-        method: 'POST',
-        headers: {
-          'Authorization': `Snowflake Token="${freshToken}"`,
-          'Content-Type': 'application/json',
-          'Accept': 'application/json',
-          'X-Snowflake-Authorization-Token-Type': 'SNOWFLAKE',
-        },
-        body: JSON.stringify(body),
-        signal: signal ?? undefined,
-      })
+      response = await post(await ensureAuth())
     }
 
     if (response.status === 422) {
@@ -182,7 +265,7 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
       // 401 → re-auth and retry once
       if (response.status === 401) {
         sessionToken = null
-        return executeStatement(sql, signal)
+        return executeStatement(sql, signal, bindings)
       }
       throw new Error(errData.message || `Snowflake API error (HTTP ${response.status})`)
     }
@@ -217,11 +300,7 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
 
       const token = await ensureAuth()
       const response = await fetch(`${baseUrl}/api/v2/statements/${handle}`, {
-        headers: {
-          'Authorization': `Snowflake Token="${token}"`,
-          'Accept': 'application/json',
-          'X-Snowflake-Authorization-Token-Type': 'SNOWFLAKE',
-        },
+        headers: authHeaders(token),
         signal: signal ?? undefined,
       })
 
@@ -244,21 +323,19 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
     rowType: { name: string; type: string }[] | undefined,
   ): Record<string, unknown>[] {
     if (!data || !rowType) return []
+    // Snowflake returns all values as strings; pick each column's parser once
+    // from its declared type rather than re-inspecting the type on every cell
+    const parsers: ((val: string) => unknown)[] = rowType.map(col => {
+      const type = col.type.toLowerCase()
+      if (['fixed', 'real', 'float'].some(t => type.includes(t))) return Number
+      if (type === 'boolean') return (val: string) => val === 'true' || val === '1'
+      return (val: string) => val
+    })
     return data.map(row => {
       const obj: Record<string, unknown> = {}
       for (let i = 0; i < rowType.length; i++) {
-        const col = rowType[i]
         const val = row[i]
-        // Snowflake returns all values as strings; parse numbers
-        if (val === null || val === undefined) {
-          obj[col.name] = null
-        } else if (['fixed', 'real', 'float'].some(t => col.type.toLowerCase().includes(t))) {
-          obj[col.name] = Number(val)
-        } else if (col.type.toLowerCase() === 'boolean') {
-          obj[col.name] = val === 'true' || val === '1'
-        } else {
-          obj[col.name] = val
-        }
+        obj[rowType[i].name] = val === null || val === undefined ? null : parsers[i](val)
       }
       return obj
     })
@@ -310,12 +387,17 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
       const rows = parseRows(resp.data, rowType)
 
       let totalRows: number | null = null
-      if (includeCount && offset === 0) {
+      if (includeCount && offset === 0 && rows.length < batchSize) {
+        // A partial first batch is the whole result; no COUNT needed
+        totalRows = rows.length
+      } else if (includeCount && offset === 0) {
         try {
           const countResp = await executeStatement(`SELECT COUNT(*) AS cnt FROM (${sql}) AS _sq`, signal)
           const countRows = parseRows(countResp.data, countResp.resultSetMetaData?.rowType)
           totalRows = Number(countRows[0]?.cnt ?? 0)
-        } catch {
+        } catch (err) {
+          // Cancellation must still reach the caller
+          if (err instanceof DOMException && err.name === 'AbortError') throw err
           // Count failed — proceed without total
         }
       }
@@ -336,41 +418,63 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
 
     async fetchDatabases(): Promise<SnowflakeDatabaseInfo[]> {
       const resp = await executeStatement('SHOW DATABASES')
+      // Only the name column is needed; read it straight from the raw rows
       const rowType = resp.resultSetMetaData?.rowType ?? []
-      const rows = parseRows(resp.data, rowType)
       const nameIdx = rowType.findIndex(r => r.name.toLowerCase() === 'name')
-      return rows
-        .map(r => ({ name: String(Object.values(r)[nameIdx >= 0 ? nameIdx : 1] ?? '') }))
-        .filter(d => !['SNOWFLAKE', 'SNOWFLAKE_SAMPLE_DATA'].includes(d.name.toUpperCase()))
+      return (resp.data ?? [])
+        .map(row => ({ name: row[nameIdx >= 0 ? nameIdx : 1] ?? '' }))
+        .filter(d => !SYSTEM_DATABASES.includes(d.name.toUpperCase()))
     },
 
     async fetchSchemas(databaseName: string): Promise<SnowflakeSchemaInfo[]> {
-      const resp = await executeStatement(`SHOW SCHEMAS IN DATABASE "${databaseName}"`)
+      const resp = await executeStatement(`SHOW SCHEMAS IN DATABASE ${quoteIdentifier(databaseName)}`)
+      // Only the name column is needed; read it straight from the raw rows
       const rowType = resp.resultSetMetaData?.rowType ?? []
-      const rows = parseRows(resp.data, rowType)
       const nameIdx = rowType.findIndex(r => r.name.toLowerCase() === 'name')
-      return rows
-        .map(r => ({ name: String(Object.values(r)[nameIdx >= 0 ? nameIdx : 1] ?? '') }))
+      return (resp.data ?? [])
+        .map(row => ({ name: row[nameIdx >= 0 ? nameIdx : 1] ?? '' }))
         .filter(s => s.name !== 'INFORMATION_SCHEMA')
     },
 
     async fetchTables(): Promise<SnowflakeTableInfo[]> {
-      // Query INFORMATION_SCHEMA across all non-system databases
+      // One account-wide SHOW returns the whole tree from the metadata layer,
+      // without a warehouse or a query per database
+      try {
+        const resp = await executeStatement('SHOW TERSE OBJECTS IN ACCOUNT')
+        if (isCompleteShowResult(resp)) {
+          const rows = parseRows(resp.data, resp.resultSetMetaData?.rowType)
+          return rows
+            .filter(row =>
+              !SYSTEM_DATABASES.includes(String(row.database_name ?? '').toUpperCase())
+              && row.schema_name !== 'INFORMATION_SCHEMA',
+            )
+            .map((row): SnowflakeTableInfo => ({
+              databaseName: String(row.database_name ?? ''),
+              schemaName: String(row.schema_name ?? ''),
+              name: String(row.name ?? ''),
+              type: String(row.kind ?? '').includes('VIEW') ? 'view' : 'table',
+            }))
+            .sort(compareTables)
+        }
+      } catch {
+        // Fall back to per-database INFORMATION_SCHEMA queries
+      }
+
       const dbs = await this.fetchDatabases()
-      const allTables: SnowflakeTableInfo[] = []
 
-      for (const db of dbs) {
+      const perDatabase = await mapConcurrent(dbs, METADATA_CONCURRENCY, async (db) => {
+        const tables: SnowflakeTableInfo[] = []
         try {
           const resp = await executeStatement(
             `SELECT TABLE_CATALOG, TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE
-             FROM "${db.name}".INFORMATION_SCHEMA.TABLES
+             FROM ${quoteIdentifier(db.name)}.INFORMATION_SCHEMA.TABLES
              WHERE TABLE_SCHEMA != 'INFORMATION_SCHEMA'
              ORDER BY TABLE_SCHEMA, TABLE_NAME`,
           )
           const rowType = resp.resultSetMetaData?.rowType ?? []
           const rows = parseRows(resp.data, rowType)
           for (const row of rows) {
-            allTables.push({
+            tables.push({
               databaseName: String(row.TABLE_CATALOG ?? db.name),
               schemaName: String(row.TABLE_SCHEMA ?? ''),
               name: String(row.TABLE_NAME ?? ''),
@@ -380,9 +484,10 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
         } catch {
           // Skip databases we can't access
         }
-      }
+        return tables
+      })
 
-      return allTables
+      return perDatabase.flat().sort(compareTables)
     },
 
     async fetchColumns(
@@ -392,9 +497,11 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
     ): Promise<SnowflakeColumnInfo[]> {
       const resp = await executeStatement(
         `SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE
-         FROM "${databaseName}".INFORMATION_SCHEMA.COLUMNS
-         WHERE TABLE_SCHEMA = '${schemaName}' AND TABLE_NAME = '${tableName}'
+         FROM ${quoteIdentifier(databaseName)}.INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?
          ORDER BY ORDINAL_POSITION`,
+        null,
+        [schemaName, tableName],
       )
       const rowType = resp.resultSetMetaData?.rowType ?? []
       const rows = parseRows(resp.data, rowType)
@@ -406,32 +513,84 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
     },
 
     async fetchAllColumns(): Promise<Record<string, SnowflakeColumnInfo[]>> {
-      const dbs = await this.fetchDatabases()
       const result: Record<string, SnowflakeColumnInfo[]> = {}
 
-      for (const db of dbs) {
-        try {
-          const resp = await executeStatement(
-            `SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
-             FROM "${db.name}".INFORMATION_SCHEMA.COLUMNS
-             WHERE TABLE_SCHEMA != 'INFORMATION_SCHEMA'
-             ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION`,
-          )
-          const rowType = resp.resultSetMetaData?.rowType ?? []
-          const rows = parseRows(resp.data, rowType)
-          for (const row of rows) {
-            const key = `${db.name}.${row.TABLE_SCHEMA}.${row.TABLE_NAME}`
-            if (!result[key]) result[key] = []
-            result[key].push({
-              name: String(row.COLUMN_NAME ?? ''),
-              type: String(row.DATA_TYPE ?? ''),
-              nullable: String(row.IS_NULLABLE ?? '') === 'YES',
-            })
+      // `scope` is ACCOUNT or DATABASE "<name>"
+      const showColumns = async (scope: string): Promise<boolean> => {
+        const resp = await executeStatement(`SHOW COLUMNS IN ${scope}`)
+        if (!isCompleteShowResult(resp)) return false
+        // Read the raw string cells by position; SHOW column order is not
+        // fixed, so resolve each index once from the result's rowType
+        const rows = resp.data ?? []
+        const names = (resp.resultSetMetaData?.rowType ?? []).map(r => r.name.toLowerCase())
+        const iDatabase = names.indexOf('database_name')
+        const iSchema = names.indexOf('schema_name')
+        const iTable = names.indexOf('table_name')
+        const iColumn = names.indexOf('column_name')
+        const iType = names.indexOf('data_type')
+        if ([iDatabase, iSchema, iTable, iColumn, iType].includes(-1)) return false
+        for (const row of rows) {
+          if (row[iSchema] === 'INFORMATION_SCHEMA') continue
+          if (SYSTEM_DATABASES.includes((row[iDatabase] ?? '').toUpperCase())) continue
+          let dataType: { type?: string; nullable?: boolean } = {}
+          try {
+            dataType = JSON.parse(row[iType] ?? '{}')
+          } catch {
+            // Leave type empty for unparseable entries
           }
+          const type = dataType.type ?? ''
+          const key = `${row[iDatabase]}.${row[iSchema]}.${row[iTable]}`
+          if (!result[key]) result[key] = []
+          result[key].push({
+            name: row[iColumn] ?? '',
+            type: SHOW_COLUMN_TYPES[type] ?? type,
+            nullable: dataType.nullable ?? true,
+          })
+        }
+        return true
+      }
+
+      const informationSchemaColumns = async (dbName: string): Promise<void> => {
+        const resp = await executeStatement(
+          `SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
+           FROM ${quoteIdentifier(dbName)}.INFORMATION_SCHEMA.COLUMNS
+           WHERE TABLE_SCHEMA != 'INFORMATION_SCHEMA'
+           ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION`,
+        )
+        // Values arrive as strings in SELECT order; destructure them directly
+        for (const [schema, table, name, type, isNullable] of resp.data ?? []) {
+          const key = `${dbName}.${schema}.${table}`
+          if (!result[key]) result[key] = []
+          result[key].push({
+            name: name ?? '',
+            type: type ?? '',
+            nullable: isNullable === 'YES',
+          })
+        }
+      }
+
+      // SHOW COLUMNS reads the metadata layer and needs no warehouse. Try the
+      // whole account in one round trip, then each database on its own, then
+      // INFORMATION_SCHEMA if SHOW fails or is truncated.
+      try {
+        if (await showColumns('ACCOUNT')) return result
+      } catch {
+        // Fall back to per-database listings
+      }
+
+      const dbs = await this.fetchDatabases()
+      await mapConcurrent(dbs, METADATA_CONCURRENCY, async (db) => {
+        try {
+          if (await showColumns(`DATABASE ${quoteIdentifier(db.name)}`)) return
+        } catch {
+          // Fall through to INFORMATION_SCHEMA
+        }
+        try {
+          await informationSchemaColumns(db.name)
         } catch {
           // Skip inaccessible databases
         }
-      }
+      })
 
       return result
     },
@@ -443,8 +602,10 @@ export function createSnowflakeRestClient(credentials: SnowflakeCredentials) {
     ): Promise<{ rowCount: number | null; sizeBytes: number | null; tableType: string | null }> {
       const resp = await executeStatement(
         `SELECT ROW_COUNT, BYTES, TABLE_TYPE
-         FROM "${databaseName}".INFORMATION_SCHEMA.TABLES
-         WHERE TABLE_SCHEMA = '${schemaName}' AND TABLE_NAME = '${tableName}'`,
+         FROM ${quoteIdentifier(databaseName)}.INFORMATION_SCHEMA.TABLES
+         WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?`,
+        null,
+        [schemaName, tableName],
       )
       const rowType = resp.resultSetMetaData?.rowType ?? []
       const rows = parseRows(resp.data, rowType)
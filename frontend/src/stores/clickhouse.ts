@@ -8,7 +8,7 @@
  */
 
 import { defineStore } from 'pinia'
-import { ref } from 'vue'
+import { ref, toRaw } from 'vue'
 import { useConnectionsStore } from './connections'
 import {
   createClickHouseHttpClient,
@@ -57,6 +57,10 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
   // Track in-flight fetchAllColumns
   const allColumnsLoading = new Map<string, Promise<void>>()
 
+  // Track in-flight fetchTables, so expanding several databases at once
+  // issues one system.tables query instead of one per database
+  const tablesLoading = new Map<string, Promise<ClickHouseTableInfo[]>>()
+
   /**
    * Get auth headers for backend API calls (web only).
    */
@@ -65,6 +69,10 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
     return useUserStore().getAuthHeaders()
   }
 
+  // Credential loads in flight, so concurrent first queries on a connection
+  // (e.g. the schema browser expanding several databases) share one fetch.
+  const pendingCredentials = new Map<string, Promise<ClickHouseCredentials>>()
+
   /**
    * Get credentials for a connection.
    * Checks in-memory cache first, then fetches from backend (web) or keychain (desktop).
@@ -73,6 +81,29 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
     const cached = credentialsCache.value.get(connectionId)
     if (cached) return cached
 
+    let pending = pendingCredentials.get(connectionId)
+    if (!pending) {
+      const load: Promise<ClickHouseCredentials> = loadCredentials(connectionId)
+        .then(credentials => {
+          // clearConnectionCache drops the entry mid-load; don't write the
+          // stale credentials back into the cache after it
+          if (pendingCredentials.get(connectionId) === load) {
+            credentialsCache.value.set(connectionId, credentials)
+          }
+          return credentials
+        })
+        .finally(() => {
+          if (pendingCredentials.get(connectionId) === load) {
+            pendingCredentials.delete(connectionId)
+          }
+        })
+      pendingCredentials.set(connectionId, load)
+      pending = load
+    }
+    return pending
+  }
+
+  async function loadCredentials(connectionId: string): Promise<ClickHouseCredentials> {
     const conn = connectionsStore.connections.find(c => c.id === connectionId)
     if (!conn || conn.type !== 'clickhouse') {
       throw new Error('ClickHouse connection not found')
@@ -104,15 +135,28 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
       secure: conn.clickhouseSecure ?? true,
     }
 
-    credentialsCache.value.set(connectionId, credentials)
     return credentials
   }
 
   /**
    * Get an HTTP client for a connection.
    */
+  // Client cache keyed by connection id, rebuilt whenever the cached
+  // credentials object changes.
+  const clientCache = new Map<string, {
+    credentials: ClickHouseCredentials
+    client: ReturnType<typeof createClickHouseHttpClient>
+  }>()
+
   async function clientFor(connectionId: string) {
-    return createClickHouseHttpClient(await getCredentials(connectionId))
+    // credentialsCache is deeply reactive and hands back proxies; compare the
+    // underlying objects so the cached client is actually reused
+    const credentials = toRaw(await getCredentials(connectionId))
+    const cached = clientCache.get(connectionId)
+    if (cached && cached.credentials === credentials) return cached.client
+    const client = createClickHouseHttpClient(credentials)
+    clientCache.set(connectionId, { credentials, client })
+    return client
   }
 
   /**
@@ -240,9 +284,17 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
       const cached = tablesCache.value.get(connectionId)
       if (cached) return cached
     }
-    const tables = await (await clientFor(connectionId)).fetchTables()
-    tablesCache.value.set(connectionId, tables)
-    return tables
+    const existing = tablesLoading.get(connectionId)
+    if (existing) return existing
+
+    const promise = (async () => {
+      const tables = await (await clientFor(connectionId)).fetchTables()
+      tablesCache.value.set(connectionId, tables)
+      return tables
+    })()
+
+    tablesLoading.set(connectionId, promise)
+    try { return await promise } finally { tablesLoading.delete(connectionId) }
   }
 
   const fetchTablesForDatabase = async (
@@ -346,6 +398,8 @@ export const useClickHouseStore = defineStore('clickhouse', () => {
 
   const clearConnectionCache = (connectionId: string): void => {
     credentialsCache.value.delete(connectionId)
+    pendingCredentials.delete(connectionId)
+    clientCache.delete(connectionId)
     databasesCache.value.delete(connectionId)
     tablesCache.value.delete(connectionId)
     for (const key of tablesCache.value.keys()) {
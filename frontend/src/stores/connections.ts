@@ -39,6 +39,10 @@ interface TokenEntry {
   expiresAt: number
 }
 
+// Treat tokens as expired slightly early so a request doesn't start with a
+// token that lapses in flight and comes back as a 401.
+const TOKEN_EXPIRY_MARGIN_MS = 60_000
+
 export const useConnectionsStore = defineStore('connections', () => {
   const connections = ref<Connection[]>([])
   const activeConnectionId = ref<string | null>(null)
@@ -46,6 +50,9 @@ export const useConnectionsStore = defineStore('connections', () => {
   // In-memory only - access tokens are not persisted
   const accessTokens = ref<Map<string, TokenEntry>>(new Map())
 
+  // Refreshes in flight per connection, so concurrent callers share one
+  const pendingRefreshes = new Map<string, Promise<string>>()
+
   // Computed: get active connection object
   const activeConnection = computed(() => {
     if (!activeConnectionId.value) return null
@@ -118,7 +125,7 @@ export const useConnectionsStore = defineStore('connections', () => {
   const getAccessToken = (connectionId: string): string | null => {
     const entry = accessTokens.value.get(connectionId)
     if (!entry) return null
-    if (Date.now() > entry.expiresAt) return null
+    if (Date.now() > entry.expiresAt - TOKEN_EXPIRY_MARGIN_MS) return null
     return entry.token
   }
 
@@ -128,7 +135,24 @@ export const useConnectionsStore = defineStore('connections', () => {
     return connection?.email || null
   }
 
-  const refreshAccessToken = async (connectionId: string): Promise<string> => {
+  // Pass `rejectedToken` when the provider just rejected it (e.g. a 401), so
+  // the backend skips its cached copy instead of handing the same token back.
+  const refreshAccessToken = async (connectionId: string, rejectedToken?: string): Promise<string> => {
+    let pending = pendingRefreshes.get(connectionId)
+    if (pending && rejectedToken && (await pending) === rejectedToken) {
+      // That refresh handed back the rejected token; share a forced one instead
+      pending = pendingRefreshes.get(connectionId)
+    }
+    if (pending) return pending
+
+    const refresh = fetchAccessToken(connectionId, rejectedToken).finally(() => {
+      pendingRefreshes.delete(connectionId)
+    })
+    pendingRefreshes.set(connectionId, refresh)
+    return refresh
+  }
+
+  const fetchAccessToken = async (connectionId: string, rejectedToken?: string): Promise<string> => {
     const email = getConnectionEmail(connectionId)
     if (!email) {
       throw new Error('No email found for connection')
@@ -146,7 +170,7 @@ export const useConnectionsStore = defineStore('connections', () => {
     const response = await fetch(`${BACKEND_URL}/auth/refresh`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ email })
+      body: JSON.stringify({ email, rejected_token: rejectedToken })
     })
 
     if (!response.ok) {
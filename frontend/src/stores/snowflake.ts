@@ -8,7 +8,7 @@
  */
 
 import { defineStore } from 'pinia'
-import { ref } from 'vue'
+import { ref, toRaw } from 'vue'
 import { useConnectionsStore } from './connections'
 import {
   createSnowflakeRestClient,
@@ -59,15 +59,46 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
 
   const allColumnsLoading = new Map<string, Promise<void>>()
 
+  // Track in-flight fetchTables, so expanding several schemas at once
+  // issues one account-wide listing instead of one per schema
+  const tablesLoading = new Map<string, Promise<SnowflakeTableInfo[]>>()
+
   async function getAuthHeaders(): Promise<Record<string, string>> {
     const { useUserStore } = await import('./user')
     return useUserStore().getAuthHeaders()
   }
 
+  // Credential loads in flight, so concurrent first queries on a connection
+  // share one backend fetch (and one server-side decrypt).
+  const pendingCredentials = new Map<string, Promise<SnowflakeCredentials>>()
+
   async function getCredentials(connectionId: string): Promise<SnowflakeCredentials> {
     const cached = credentialsCache.value.get(connectionId)
     if (cached) return cached
 
+    let pending = pendingCredentials.get(connectionId)
+    if (!pending) {
+      const load: Promise<SnowflakeCredentials> = loadCredentials(connectionId)
+        .then(credentials => {
+          // clearConnectionCache drops the entry mid-load; don't write the
+          // stale credentials back into the cache after it
+          if (pendingCredentials.get(connectionId) === load) {
+            credentialsCache.value.set(connectionId, credentials)
+          }
+          return credentials
+        })
+        .finally(() => {
+          if (pendingCredentials.get(connectionId) === load) {
+            pendingCredentials.delete(connectionId)
+          }
+        })
+      pendingCredentials.set(connectionId, load)
+      pending = load
+    }
+    return pending
+  }
+
+  async function loadCredentials(connectionId: string): Promise<SnowflakeCredentials> {
     const conn = connectionsStore.connections.find(c => c.id === connectionId)
     if (!conn || conn.type !== 'snowflake') {
       throw new Error('Snowflake connection not found')
@@ -98,12 +129,36 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
       role: conn.snowflakeRole ?? null,
     }
 
-    credentialsCache.value.set(connectionId, credentials)
     return credentials
   }
 
+  // Client cache keyed by connection id — reusing the client keeps its Snowflake
+  // session token, so queries don't each pay a fresh login round-trip.
+  // Rebuilt whenever the cached credentials object changes.
+  const clientCache = new Map<string, {
+    credentials: SnowflakeCredentials
+    client: ReturnType<typeof createSnowflakeRestClient>
+  }>()
+
   async function clientFor(connectionId: string) {
-    return createSnowflakeRestClient(await getCredentials(connectionId))
+    // credentialsCache is deeply reactive and hands back proxies; compare the
+    // underlying objects so a cached (or adopted) client is actually reused
+    const credentials = toRaw(await getCredentials(connectionId))
+    const cached = clientCache.get(connectionId)
+    if (cached && cached.credentials === credentials) return cached.client
+    const client = createSnowflakeRestClient(credentials)
+    clientCache.set(connectionId, { credentials, client })
+    return client
+  }
+
+  // Client from the last successful connection test, handed to createConnection
+  let lastTested: {
+    credentials: SnowflakeCredentials
+    client: ReturnType<typeof createSnowflakeRestClient>
+  } | null = null
+
+  function sameCredentials(a: SnowflakeCredentials, b: SnowflakeCredentials): boolean {
+    return (Object.keys(a) as (keyof SnowflakeCredentials)[]).every(k => a[k] === b[k])
   }
 
   const testConnection = async (
@@ -117,8 +172,11 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
   ): Promise<TestConnectionResult> => {
     isTesting.value = true
     try {
-      const client = createSnowflakeRestClient({ account, username, password, warehouse, database, schemaName, role })
-      return await client.testConnection()
+      const credentials: SnowflakeCredentials = { account, username, password, warehouse, database, schemaName, role }
+      const client = createSnowflakeRestClient(credentials)
+      const result = await client.testConnection()
+      lastTested = result.success ? { credentials, client } : null
+      return result
     } finally {
       isTesting.value = false
     }
@@ -175,7 +233,14 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
         snowflakeRole: role || undefined,
       })
 
-      credentialsCache.value.set(id, { account, username, password, warehouse, database, schemaName, role })
+      const credentials: SnowflakeCredentials = { account, username, password, warehouse, database, schemaName, role }
+      credentialsCache.value.set(id, credentials)
+      // Adopt the client from a test of these exact credentials, so the first
+      // query reuses its session instead of logging in again
+      if (lastTested && sameCredentials(lastTested.credentials, credentials)) {
+        clientCache.set(id, { credentials, client: lastTested.client })
+      }
+      lastTested = null
 
       return id
     } finally {
@@ -238,9 +303,17 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
       const cached = tablesCache.value.get(connectionId)
       if (cached) return cached
     }
-    const tables = await (await clientFor(connectionId)).fetchTables()
-    tablesCache.value.set(connectionId, tables)
-    return tables
+    const existing = tablesLoading.get(connectionId)
+    if (existing) return existing
+
+    const promise = (async () => {
+      const tables = await (await clientFor(connectionId)).fetchTables()
+      tablesCache.value.set(connectionId, tables)
+      return tables
+    })()
+
+    tablesLoading.set(connectionId, promise)
+    try { return await promise } finally { tablesLoading.delete(connectionId) }
   }
 
   const fetchTablesForSchema = async (
@@ -347,6 +420,8 @@ export const useSnowflakeStore = defineStore('snowflake', () => {
 
   const clearConnectionCache = (connectionId: string): void => {
     credentialsCache.value.delete(connectionId)
+    pendingCredentials.delete(connectionId)
+    clientCache.delete(connectionId)
     databasesCache.value.delete(connectionId)
     tablesCache.value.delete(connectionId)
     for (const key of tablesCache.value.keys()) {
@@ -0,0 +1,58 @@
+import { describe, it, expect } from 'vitest'
+import { convertBigQueryRows, convertBigQueryValue } from './bigqueryConversion'
+import type { BigQueryField } from '../types/bigquery'
+
+describe('convertBigQueryRows', () => {
+  it('converts scalar columns by type', () => {
+    const fields: BigQueryField[] = [
+      { name: 'id', type: 'INTEGER' },
+      { name: 'score', type: 'FLOAT' },
+      { name: 'active', type: 'BOOLEAN' },
+      { name: 'ts', type: 'TIMESTAMP' },
+      { name: 'name', type: 'STRING' },
+    ]
+    const rows = [
+      { f: [{ v: '1' }, { v: '2.5' }, { v: 'true' }, { v: '1704067200' }, { v: 'Alice' }] },
+      { f: [{ v: null }, { v: null }, { v: 'false' }, { v: null }, { v: null }] },
+    ]
+
+    expect(convertBigQueryRows(rows, fields)).toEqual([
+      { id: 1, score: 2.5, active: true, ts: '2024-01-01T00:00:00.000Z', name: 'Alice' },
+      { id: null, score: null, active: false, ts: null, name: null },
+    ])
+  })
+
+  it('converts nested records and repeated fields', () => {
+    const fields: BigQueryField[] = [
+      {
+        name: 'user',
+        type: 'RECORD',
+        fields: [
+          { name: 'age', type: 'INTEGER' },
+          { name: 'tags', type: 'STRING', mode: 'REPEATED' },
+        ],
+      },
+      { name: 'counts', type: 'INTEGER', mode: 'REPEATED' },
+    ]
+    const rows = [
+      {
+        f: [
+          { v: { f: [{ v: '30' }, { v: [{ v: 'a' }, { v: 'b' }] }] } },
+          { v: [{ v: '1' }, { v: '2' }] },
+        ],
+      },
+    ]
+
+    expect(convertBigQueryRows(rows, fields)).toEqual([
+      { user: { age: 30, tags: ['a', 'b'] }, counts: [1, 2] },
+    ])
+  })
+})
+
+describe('convertBigQueryValue', () => {
+  it('parses JSON strings and keeps invalid JSON as-is', () => {
+    const field: BigQueryField = { name: 'payload', type: 'JSON' }
+    expect(convertBigQueryValue('{"a":1}', field)).toEqual({ a: 1 })
+    expect(convertBigQueryValue('not json', field)).toBe('not json')
+  })
+})
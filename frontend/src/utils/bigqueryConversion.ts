@@ -31,81 +31,113 @@
 
 import type { BigQueryField, BigQueryRow } from '../types/bigquery'
 
+type ValueConverter = (value: unknown) => unknown
+
+const identity: ValueConverter = value => value
+
 /**
- * Converts a single BigQuery value to a proper JavaScript type.
- * Handles the {f: [{v: ...}]} format for STRUCTs and REPEATED fields.
+ * Builds the converter for one field. The type dispatch (upper-casing the type
+ * name and walking the if-chain) runs once per column here instead of once per
+ * cell, and STRUCT/REPEATED fields get their nested converters built up front.
  *
- * @param value - The raw value from BigQuery's JSON response
  * @param field - The field schema with type information
- * @returns The converted JavaScript value
+ * @returns A function converting raw values of that field (null-safe)
  */
-export const convertBigQueryValue = (value: unknown, field: BigQueryField): unknown => {
-  if (value === null || value === undefined) return null
-
-  const type = field.type.toUpperCase()
+const makeConverter = (field: BigQueryField): ValueConverter => {
+  const scalar = makeScalarConverter(field)
 
   // ARRAY/REPEATED - convert each element first (before checking type)
   // BigQuery wraps each array element in {v: ...}
-  if (field.mode === 'REPEATED' && Array.isArray(value)) {
-    const elementField: BigQueryField = { ...field, mode: undefined }
-    return (value as Array<{ v: unknown }>).map(item =>
-      convertBigQueryValue(item.v, elementField)
-    )
+  if (field.mode === 'REPEATED') {
+    const element = makeConverter({ ...field, mode: undefined })
+    return value => {
+      if (value === null || value === undefined) return null
+      if (Array.isArray(value)) {
+        return (value as Array<{ v: unknown }>).map(item => element(item.v))
+      }
+      return scalar(value)
+    }
   }
 
+  return value => (value === null || value === undefined ? null : scalar(value))
+}
+
+/** Converter for a non-null value of a non-repeated field. */
+const makeScalarConverter = (field: BigQueryField): ValueConverter => {
+  const type = field.type.toUpperCase()
+
   // RECORD/STRUCT - recursively convert nested fields
   // BigQuery returns: {f: [{v: field1Value}, {v: field2Value}, ...]}
   if (type === 'RECORD' || type === 'STRUCT') {
-    const recordValue = value as { f?: Array<{ v: unknown }> }
-    if (!recordValue.f || !field.fields) return value
-
-    const obj: Record<string, unknown> = {}
-    field.fields.forEach((subField, i) => {
-      if (recordValue.f && recordValue.f[i]) {
-        obj[subField.name] = convertBigQueryValue(recordValue.f[i].v, subField)
+    const subFields = field.fields
+    if (!subFields) return identity
+    const names = subFields.map(f => f.name)
+    const converters = subFields.map(makeConverter)
+
+    return value => {
+      const cells = (value as { f?: Array<{ v: unknown }> }).f
+      if (!cells) return value
+
+      const obj: Record<string, unknown> = {}
+      for (let i = 0; i < converters.length; i++) {
+        if (cells[i]) obj[names[i]] = converters[i](cells[i].v)
       }
-    })
-    return obj
+      return obj
+    }
   }
 
   // Numeric types - BigQuery returns as strings
   if (type === 'INTEGER' || type === 'INT64') {
-    return parseInt(value as string, 10)
+    return value => parseInt(value as string, 10)
   }
   if (type === 'FLOAT' || type === 'FLOAT64' || type === 'NUMERIC' || type === 'BIGNUMERIC') {
-    return parseFloat(value as string)
+    return value => parseFloat(value as string)
   }
 
   // Boolean - BigQuery returns as "true"/"false" strings
   if (type === 'BOOLEAN' || type === 'BOOL') {
-    return value === 'true' || value === true
+    return value => value === 'true' || value === true
   }
 
   // Timestamps - BigQuery returns epoch seconds as float string (e.g., "1704067200.123")
   // Convert to ISO 8601 string which DuckDB can parse when cast to TIMESTAMP
   if (type === 'TIMESTAMP' || type === 'DATETIME') {
-    const epochSeconds = parseFloat(value as string)
-    if (!isNaN(epochSeconds)) {
-      return new Date(epochSeconds * 1000).toISOString()
+    return value => {
+      const epochSeconds = parseFloat(value as string)
+      return isNaN(epochSeconds) ? value : new Date(epochSeconds * 1000).toISOString()
     }
   }
 
   // JSON - parse string into object so it survives JSON serialization for DuckDB import
   if (type === 'JSON') {
-    if (typeof value === 'string') {
+    return value => {
+      if (typeof value !== 'string') return value
       try {
         return JSON.parse(value)
       } catch {
         return value
       }
     }
-    return value
   }
 
   // DATE, TIME, STRING, BYTES, GEOGRAPHY - pass through as-is
-  return value
+  return identity
 }
 
+/**
+ * Converts a single BigQuery value to a proper JavaScript type.
+ * Handles the {f: [{v: ...}]} format for STRUCTs and REPEATED fields.
+ *
+ * Prefer {@link convertBigQueryRows} for whole result sets; it builds each
+ * column's converter once rather than per value.
+ *
+ * @param value - The raw value from BigQuery's JSON response
+ * @param field - The field schema with type information
+ * @returns The converted JavaScript value
+ */
+export const convertBigQueryValue = (value: unknown, field: BigQueryField): unknown =>
+  makeConverter(field)(value)
+
 /**
  * Converts BigQuery API response rows to clean JavaScript objects.
  * This is the main entry point for conversion.
@@ -122,13 +154,20 @@ export const convertBigQueryRows = (
   rows: BigQueryRow[],
   fields: BigQueryField[]
 ): Record<string, unknown>[] => {
-  return rows.map(row => {
+  const names = fields.map(f => f.name)
+  const converters = fields.map(makeConverter)
+  const columnCount = fields.length
+
+  const out = new Array<Record<string, unknown>>(rows.length)
+  for (let r = 0; r < rows.length; r++) {
+    const cells = rows[r].f
     const obj: Record<string, unknown> = {}
-    fields.forEach((field, i) => {
-      obj[field.name] = convertBigQueryValue(row.f[i].v, field)
-    })
-    return obj
-  })
+    for (let i = 0; i < columnCount; i++) {
+      obj[names[i]] = converters[i](cells[i].v)
+    }
+    out[r] = obj
+  }
+  return out
 }
 
 /**